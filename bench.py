@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+'''
+benchmarks for my_tools and ip2hex on deterministic synthetic data
+
+python bench.py                                  -> runs everything at 1e3, 1e4, 1e5, writes bench.json
+python bench.py --sizes 1e3,1e7 --only mac       -> only benchmarks with mac in the name
+python bench.py --out new.json --compare bench.json --threshold 0.1
+                                                 -> flags benchmarks more than 10% slower than bench.json
+'''
+import random
+
+############ dataset generators ###################
+
+def gen_ipv4(n, seed=0, distribution='uniform', clusters=16):
+    '''
+    returns list of n IPv4 address strings
+    uniform draws from the whole address space,
+    clustered draws from a few random /16s, like hosts of a site
+    '''
+    r = random.Random(seed)
+    if distribution == 'uniform':
+        ints = [r.getrandbits(32) for _ in range(n)]
+    elif distribution == 'clustered':
+        bases = [r.getrandbits(16) << 16 for _ in range(clusters)]
+        ints = [r.choice(bases) | r.getrandbits(16) for _ in range(n)]
+    else:
+        raise ValueError("Unknown distribution: %s" % distribution)
+    return ['%d.%d.%d.%d' % (i >> 24, i >> 16 & 255, i >> 8 & 255, i & 255) for i in ints]
+
+def gen_prefixes(n, seed=0, minlen=8, maxlen=32, distribution='uniform'):
+    '''
+    returns list of n IPv4 network strings with prefix lengths between minlen and maxlen
+    routing weights the lengths like a routing table, mostly /24 with some shorter prefixes
+    '''
+    r = random.Random(seed)
+    if distribution == 'uniform':
+        lengths = [r.randint(minlen, maxlen) for _ in range(n)]
+    elif distribution == 'routing':
+        pairs = [(p, w) for p, w in zip((16, 19, 20, 21, 22, 23, 24), (1, 2, 3, 4, 8, 8, 60)) if minlen <= p <= maxlen]
+        choices, weights = zip(*pairs) if pairs else ((maxlen,), (1,))
+        lengths = r.choices(choices, weights, k=n)
+    else:
+        raise ValueError("Unknown distribution: %s" % distribution)
+    nets = []
+    for plen in lengths:
+        i = r.getrandbits(32) & (((1 << plen) - 1) << (32 - plen))
+        nets.append('%d.%d.%d.%d/%d' % (i >> 24, i >> 16 & 255, i >> 8 & 255, i & 255, plen))
+    return nets
+
+def gen_macs(n, seed=0, form='mixed'):
+    '''
+    returns list of n mac address strings
+    form is colon (xx:xx:xx:xx:xx:xx), dot (xxxx.xxxx.xxxx), plain (xxxxxxxxxxxx)
+    or mixed, an even mix of the three
+    '''
+    r = random.Random(seed)
+    forms = ('colon', 'dot', 'plain') if form == 'mixed' else (form,)
+    macs = []
+    for i in range(n):
+        h = '%012x' % r.getrandbits(48)
+        f = forms[i % len(forms)]
+        if f == 'colon':
+            macs.append(':'.join(h[j:j + 2] for j in range(0, 12, 2)))
+        elif f == 'dot':
+            macs.append(h[0:4] + '.' + h[4:8] + '.' + h[8:12])
+        elif f == 'plain':
+            macs.append(h)
+        else:
+            raise ValueError("Unknown mac form: %s" % f)
+    return macs
+
+############ benchmarks ###################
+## each benchmark takes (size, seed) and returns a function to time
+## setup happens outside the timed function
+
+def bench_mac_parse(size, seed):
+    from my_tools import MacAddress
+    macs = gen_macs(size, seed)
+    return lambda: [MacAddress(m) for m in macs]
+
+def bench_mac_array_parse(size, seed):
+    from my_tools import MacAddressArray
+    macs = gen_macs(size, seed)
+    return lambda: MacAddressArray(macs)
+
+def bench_mac_array_flags(size, seed):
+    from my_tools import MacAddressArray
+    macs = MacAddressArray(gen_macs(size, seed))
+    return lambda: (macs.isGroup(), macs.isGlobal(), macs.bitswap_mac())
+
+def bench_netarray_parse(size, seed):
+    from my_tools import IPv4NetworkArray
+    nets = gen_prefixes(size, seed, distribution='routing')
+    return lambda: IPv4NetworkArray(nets)
+
+def bench_netarray_sort(size, seed):
+    from my_tools import IPv4NetworkArray
+    nets = IPv4NetworkArray(gen_prefixes(size, seed, distribution='routing'))
+    return lambda: nets.new_sort()
+
+def bench_netarray_contains(size, seed):
+    from my_tools import IPv4NetworkArray
+    nets = IPv4NetworkArray(gen_prefixes(size, seed, distribution='routing')).build_index()
+    ips = gen_ipv4(size, seed + 1)
+    return lambda: [ip in nets for ip in ips]
+
+def bench_netarray_find_all(size, seed):
+    from my_tools import IPv4NetworkArray
+    nets = IPv4NetworkArray(gen_prefixes(size, seed, distribution='routing')).build_index()
+    ips = gen_ipv4(size, seed + 1)
+    return lambda: [nets.find_all_nets_for_ip(ip) for ip in ips]
+
+def bench_netarray_contains_many(size, seed):
+    from my_tools import IPv4NetworkArray
+    nets = IPv4NetworkArray(gen_prefixes(size, seed, distribution='routing'))
+    ips = gen_ipv4(size, seed + 1)
+    return lambda: nets.contains_many(ips)
+
+def bench_netarray_match_many(size, seed):
+    from my_tools import IPv4NetworkArray
+    nets = IPv4NetworkArray(gen_prefixes(size, seed, distribution='routing'))
+    ips = gen_ipv4(size, seed + 1)
+    return lambda: nets.match_many(ips)
+
+def bench_netarray_difference(size, seed):
+    from my_tools import IPv4NetworkArray
+    a = IPv4NetworkArray(gen_prefixes(size, seed, distribution='routing'))
+    b = IPv4NetworkArray(gen_prefixes(size, seed + 1, distribution='routing'))
+    return lambda: a - b
+
+def bench_free_ranges(size, seed):
+    from my_tools import free_ranges
+    ips = gen_ipv4(size, seed, distribution='clustered')
+    return lambda: list(free_ranges(ips))
+
+def bench_findholes(size, seed):
+    from my_tools import findholes
+    ## findholes lists every missing address, one cluster keeps that to a /16
+    ips = gen_ipv4(size, seed, distribution='clustered', clusters=1)
+    return lambda: (findholes(ips), list(findholes(ips, terse=False, lazy=True)))
+
+def bench_aggregate(size, seed):
+    from my_tools import aggregate
+    ips = gen_ipv4(size, seed, distribution='clustered')
+    return lambda: aggregate(ips, maxprefix=24)
+
+def bench_summarize(size, seed):
+    from my_tools import summarize
+    ips = gen_ipv4(size, seed)
+    return lambda: summarize(ips, 24)
+
+def bench_ip2hex(size, seed):
+    from ip2hex import convert_lines
+    lines = [ip + '\n' for ip in gen_ipv4(size, seed)]
+    return lambda: convert_lines(lines)
+
+def bench_hex2ip(size, seed):
+    from ip2hex import convert_lines
+    r = random.Random(seed)
+    lines = ['%s\n' % hex(r.getrandbits(32)) for _ in range(size)]
+    return lambda: convert_lines(lines)
+
+BENCHMARKS = {name[len('bench_'):]: func for name, func in sorted(globals().items()) if name.startswith('bench_')}
+
+############ runner ###################
+
+def run(names, sizes, repeat=3, seed=0, log=None):
+    '''
+    returns results dict keyed by name@size with best and median seconds over repeat runs
+    '''
+    import gc
+    import time
+    results = {}
+    for name in names:
+        for size in sizes:
+            func = BENCHMARKS[name](size, seed)
+            times = []
+            for _ in range(repeat):
+                gc.collect()
+                start = time.perf_counter()
+                func()
+                times.append(time.perf_counter() - start)
+            times.sort()
+            key = '%s@%d' % (name, size)
+            results[key] = {
+                'name': name,
+                'size': size,
+                'best': times[0],
+                'median': times[len(times) // 2],
+                'per_item_ns': times[0] / size * 1e9,
+            }
+            if log:
+                log("%-36s %12.6fs %10.1f ns/item" % (key, times[0], results[key]['per_item_ns']))
+    return results
+
+def metadata(seed, repeat):
+    import datetime
+    import platform
+    from my_tools import _numpy
+    np = _numpy()
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'numpy': np.__version__ if np is not None else None,
+        'seed': seed,
+        'repeat': repeat,
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+
+def compare(results, baseline, threshold=0.1):
+    '''
+    returns list of (key, baseline best, new best, ratio) for benchmarks in both
+    that got more than threshold slower
+    '''
+    regressions = []
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None or not old['best']:
+            continue
+        ratio = new['best'] / old['best']
+        if ratio > 1 + threshold:
+            regressions.append((key, old['best'], new['best'], ratio))
+    return regressions
+
+def _sizes(text):
+    return [int(float(s)) for s in text.split(',') if s]
+
+def main(argv=None):
+    import argparse
+    import json
+    import os
+    import sys
+    parser = argparse.ArgumentParser(description='benchmark my_tools and ip2hex on synthetic data')
+    parser.add_argument('--sizes', type=_sizes, default=[1000, 10000, 100000], help='comma separated element counts, e.g. 1e3,1e5,1e7')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, best and median are kept')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the dataset generators')
+    parser.add_argument('--only', action='append', help='only run benchmarks containing this text, may be repeated')
+    parser.add_argument('--list', action='store_true', help='list benchmark names and exit')
+    parser.add_argument('--out', default='bench.json', help='json file for the results')
+    parser.add_argument('--compare', metavar='BASELINE', help='json file of an earlier run to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.1, help='slowdown ratio counted as a regression')
+    args = parser.parse_args(argv)
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return 0
+    ## the baseline is read before anything is written, --out must not replace it
+    if args.compare:
+        if os.path.exists(args.out) and os.path.samefile(args.out, args.compare):
+            parser.error('--out and --compare are the same file, the baseline would be overwritten')
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    names = [n for n in BENCHMARKS if not args.only or any(o in n for o in args.only)]
+    log = lambda line: print(line, file=sys.stderr)
+    results = run(names, args.sizes, args.repeat, args.seed, log)
+    with open(args.out, 'w') as f:
+        json.dump({'meta': metadata(args.seed, args.repeat), 'results': results}, f, indent=2)
+    if args.compare:
+        regressions = compare(results, baseline, args.threshold)
+        for key, old, new, ratio in regressions:
+            print("REGRESSION %-36s %.6fs -> %.6fs (x%.2f)" % (key, old, new, ratio))
+        if regressions:
+            return 1
+        print("no regressions against %s" % args.compare)
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
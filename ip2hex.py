@@ -1,24 +1,198 @@
 #!/usr/bin/env python3
+'''
+converts IP addresses to hex and hex to IP addresses
+
+ip2hex.py 10.1.2.3             -> 0xa010203
+ip2hex.py 0xa010203            -> 10.1.2.3
+ip2hex.py < file               -> converts every line, streaming
+ip2hex.py -f a.csv --column 3 --delimiter , --jobs 4
+                               -> rewrites the third field of every csv line in place
+'''
+import ipaddress
+import re
+import socket
+
+## a field when no delimiter is given: a run of non whitespace
+_FIELD_RE = re.compile(r'\S+')
 
 def ip2hex(iporhex):
     '''
+    converts an IP address to hex, or hex to an IP address
+    the direction is picked from the characters in the value, so a value
+    is parsed once and only malformed values raise
+    ints and ipaddress objects are converted to hex through ipaddress
     '''
-    import ipaddress
+    if not isinstance(iporhex, str):
+        try:
+            return hex(int(ipaddress.ip_address(iporhex)))
+        except (TypeError, ValueError):
+            raise ValueError("Wrong format")
+    value = iporhex.strip()
     try:
-      try:
-        return hex(int(ipaddress.ip_address(iporhex)))
-      except:
-        return str(ipaddress.ip_address(int(iporhex,16)))
-    except:
+        if ':' in value:
+            return hex(int.from_bytes(socket.inet_pton(socket.AF_INET6, value), 'big'))
+        if '.' in value:
+            return hex(int.from_bytes(socket.inet_pton(socket.AF_INET, value), 'big'))
+        ip = int(value, 16)
+        if 0 <= ip < 2 ** 32:
+            return socket.inet_ntop(socket.AF_INET, ip.to_bytes(4, 'big'))
+        return str(ipaddress.IPv6Address(ip))
+    except (OSError, ValueError):
         raise ValueError("Wrong format")
 
 hex2ip = ip2hex
 
-if __name__ == "__main__":
+def _field_span(body, column, delimiter):
+    '''
+    returns (start, end) of field column (1 based) of body, None if the line is shorter
+    without delimiter fields are runs of non whitespace, with one fields may be
+    double quoted csv style, so delimiters inside quotes do not split
+    '''
+    if delimiter is None:
+        for index, field in enumerate(_FIELD_RE.finditer(body), 1):
+            if index == column:
+                return field.span()
+        return None
+    start = 0
+    for index in range(1, column + 1):
+        if start > len(body):
+            return None
+        search = start
+        if body.startswith('"', start):
+            ## skip to the closing quote, "" is an escaped quote
+            search = start + 1
+            while True:
+                search = body.find('"', search)
+                if search == -1:
+                    search = len(body)
+                    break
+                if not body.startswith('"', search + 1):
+                    break
+                search += 2
+        end = body.find(delimiter, search)
+        if end == -1:
+            end = len(body)
+        if index == column:
+            return start, end
+        start = end + len(delimiter)
+    return None
+
+def convert_lines(lines, column=None, delimiter=None):
+    '''
+    returns (converted lines, number of values that could not be converted)
+    column is 1 based, if given only that field of each line is converted
+    fields are split on delimiter, csv style quotes respected, default is runs of whitespace
+    only the value itself is replaced, every other character of the line is kept as it was
+    values that cannot be converted are left as they are
+    '''
+    out = []
+    errors = 0
+    for line in lines:
+        body = line.rstrip('\r\n')
+        span = (0, len(body)) if column is None else _field_span(body, column, delimiter)
+        if span is not None:
+            start, end = span
+            if end - start >= 2 and body[start] == '"' and body[end - 1] == '"':
+                start, end = start + 1, end - 1
+            value = body[start:end]
+            stripped = value.strip()
+            if stripped:
+                start += len(value) - len(value.lstrip())
+                end = start + len(stripped)
+                try:
+                    line = line[:start] + ip2hex(stripped) + line[end:]
+                except ValueError:
+                    errors += 1
+        out.append(line)
+    return out, errors
+
+def _convert_chunk(lines, column, delimiter):
+    '''
+    worker for the multi-process executor, returns (text, lines, errors)
+    '''
+    out, errors = convert_lines(lines, column, delimiter)
+    return ''.join(out), len(lines), errors
+
+def _read_chunks(files, chunk_lines):
+    '''
+    yields lists of up to chunk_lines lines from each file in turn, '-' is stdin
+    '''
     import sys
-    try:
-        arg = sys.argv[1]
-    except IndexError:
+    from itertools import islice
+    for name in files:
+        f = sys.stdin if name == '-' else open(name, newline='')
+        try:
+            while True:
+                chunk = list(islice(f, chunk_lines))
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+def stream(files, out, column=None, delimiter=None, jobs=1, chunk_lines=65536):
+    '''
+    converts files line by line into out, returns (lines, errors)
+    with jobs > 1 chunks are converted by a process pool, at most 2 * jobs
+    chunks are in flight so memory stays bounded, output keeps input order
+    '''
+    from collections import deque
+    lines = errors = 0
+    chunks = _read_chunks(files, chunk_lines)
+    if jobs <= 1:
+        for chunk in chunks:
+            text, n, e = _convert_chunk(chunk, column, delimiter)
+            out.write(text)
+            lines += n
+            errors += e
+        return lines, errors
+    from multiprocessing import Pool
+    with Pool(jobs) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(_convert_chunk, (chunk, column, delimiter)))
+            if len(pending) >= 2 * jobs:
+                text, n, e = pending.popleft().get()
+                out.write(text)
+                lines += n
+                errors += e
+        while pending:
+            text, n, e = pending.popleft().get()
+            out.write(text)
+            lines += n
+            errors += e
+    return lines, errors
+
+def main(argv=None):
+    import argparse
+    import sys
+    import time
+    parser = argparse.ArgumentParser(description='convert IP addresses to hex and hex to IP addresses')
+    parser.add_argument('values', nargs='*', help='IP or HEX values, if none are given lines are read from files or stdin')
+    parser.add_argument('-f', '--file', action='append', dest='files', help="file to convert line by line, '-' is stdin, may be repeated")
+    parser.add_argument('-c', '--column', type=int, help='only convert this field (1 based) of each line')
+    parser.add_argument('-d', '--delimiter', help='field delimiter for --column, default is whitespace')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--chunk-lines', type=int, default=65536, help='lines per chunk handed to a worker')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report throughput on stderr')
+    args = parser.parse_args(argv)
+    if args.column is not None and args.column < 1:
+        parser.error('--column is 1 based')
+    if args.values:
+        for value in args.values:
+            print(ip2hex(value))
+        return
+    if not args.files and sys.stdin.isatty():
         print("Error: Missing IP or HEX value")
-    else:
-        print(ip2hex(arg))
\ No newline at end of file
+        return
+    start = time.perf_counter()
+    out = open(sys.stdout.fileno(), 'w', buffering=1 << 20, closefd=False, newline='')
+    with out:
+        lines, errors = stream(args.files or ['-'], out, args.column, args.delimiter, args.jobs, args.chunk_lines)
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print("%d lines in %.2fs, %.0f lines/s, %d not converted" % (lines, elapsed, lines / elapsed if elapsed else 0, errors), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+'''
+tags the IPv4 addresses and mac addresses found in log lines
+
+every IPv4 address is tagged with the networks of a IPv4NetworkArray it falls in,
+every mac address (xx:xx:xx:xx:xx:xx or xxxx.xxxx.xxxx) with its multicast and local flags
+
+logenrich.py -p prefixes.txt syslog.log                  -> line<TAB>tags to stdout
+logenrich.py -p table.ipna -j 8 --match all --format json flows.txt
+
+files are read in chunks of whole lines, with --jobs the chunks are tagged by a process pool
+that reads the prefix table and its lookup table from shared memory, output keeps input order
+and is written as chunks finish, at most 2 * jobs chunks are in flight so memory stays bounded
+'''
+import re
+
+from my_tools import IPv4NetworkArray, MacAddressArray
+
+_OCTET = rb'(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)'
+IP_RE = re.compile(rb'(?<![\d.])' + _OCTET + rb'(?:\.' + _OCTET + rb'){3}(?![\d.])')
+MAC_RE = re.compile(rb'(?<![0-9A-Fa-f:.-])(?:[0-9A-Fa-f]{2}[:-]){5}[0-9A-Fa-f]{2}(?![0-9A-Fa-f:-])'
+                    rb'|(?<![0-9A-Fa-f.])(?:[0-9A-Fa-f]{4}\.){2}[0-9A-Fa-f]{4}(?![0-9A-Fa-f.])')
+
+## per process state, set by _init_worker in pool workers
+_worker = {}
+
+def read_chunks(files, chunk_size=1 << 22):
+    '''
+    yields bytes of about chunk_size holding only whole lines, '-' is stdin
+    '''
+    import sys
+    for name in files:
+        f = sys.stdin.buffer if name == '-' else open(name, 'rb')
+        try:
+            rest = b''
+            while True:
+                block = f.read(chunk_size)
+                if not block:
+                    break
+                block = rest + block
+                cut = block.rfind(b'\n') + 1
+                if not cut:
+                    rest = block
+                    continue
+                rest = block[cut:]
+                yield block[:cut]
+            if rest:
+                yield rest + b'\n'
+        finally:
+            if f is not sys.stdin.buffer:
+                f.close()
+
+def tag_chunk(chunk, nets, match='longest', fmt='tsv'):
+    '''
+    returns bytes of the lines of chunk with their tags appended
+    match longest tags an address with its most specific network, all with every network
+    fmt tsv appends a tab and space separated ip=net,net and mac=flags tags,
+    json writes one object per line with line, ips and macs keys
+    '''
+    import json
+    lines = chunk.split(b'\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    ips, macs, spans = [], [], []
+    for line in lines:
+        found_ips = IP_RE.findall(line)
+        found_macs = MAC_RE.findall(line)
+        spans.append((len(found_ips), len(found_macs)))
+        ips.extend(found_ips)
+        macs.extend(found_macs)
+    ips = [ip.decode('ascii') for ip in ips]
+    ## one vectorized lookup for the whole chunk
+    if match == 'longest':
+        owners = nets.match_many(ips) if ips else []
+        ip_tags = [[nets[i]] if i >= 0 else [] for i in owners]
+    else:
+        ip_tags = [[nets[i] for i in found] for found in nets.find_all_many(ips)] if ips else []
+    column = MacAddressArray([m.decode('ascii') for m in macs])
+    mac_tags = list(zip(column, column.isGroup(), column.isGlobal()))
+    out = []
+    i = j = 0
+    for line, (n_ips, n_macs) in zip(lines, spans):
+        line_ips = list(zip(ips[i:i + n_ips], ip_tags[i:i + n_ips]))
+        line_macs = mac_tags[j:j + n_macs]
+        i += n_ips
+        j += n_macs
+        if fmt == 'json':
+            out.append(json.dumps({
+                'line': line.decode('utf-8', 'replace'),
+                'ips': {ip: found for ip, found in line_ips},
+                'macs': {mac.form_a: {'multicast': bool(group), 'local': not glob} for mac, group, glob in line_macs},
+            }).encode('utf-8'))
+        else:
+            tags = ['ip=%s>%s' % (ip, ','.join(found) or '-') for ip, found in line_ips]
+            tags += ['mac=%s>%s,%s' % (mac.form_a, 'multicast' if group else 'unicast', 'global' if glob else 'local')
+                     for mac, group, glob in line_macs]
+            out.append(line + b'\t' + ' '.join(tags).encode('ascii'))
+    out.append(b'')
+    return b'\n'.join(out)
+
+def _init_worker(shm_name, size):
+    '''
+    attaches a pool worker to the prefix table snapshot in shared memory
+    the snapshot carries the interval table, so workers build no lookup structure of their own
+    '''
+    from multiprocessing import shared_memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    nets = IPv4NetworkArray.from_buffer(shm.buf[:size])
+    _worker.update(shm=shm, nets=nets)
+
+def _tag_in_worker(chunk, match, fmt):
+    return tag_chunk(chunk, _worker['nets'], match, fmt)
+
+def enrich(files, nets, out, jobs=1, chunk_size=1 << 22, match='longest', fmt='tsv'):
+    '''
+    tags every line of files into the binary stream out, returns number of bytes read
+    with jobs > 1 the prefix table and the interval table both match modes look up in
+    are built once, placed in shared memory, and mapped by every worker
+    '''
+    from collections import deque
+    read = 0
+    chunks = read_chunks(files, chunk_size)
+    if jobs <= 1:
+        for chunk in chunks:
+            read += len(chunk)
+            out.write(tag_chunk(chunk, nets, match, fmt))
+        return read
+    from multiprocessing import Pool, shared_memory
+    snapshot = nets.tobytes(index=True)
+    size = len(snapshot)
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        shm.buf[:size] = snapshot
+        del snapshot
+        with Pool(jobs, _init_worker, (shm.name, size)) as pool:
+            pending = deque()
+            for chunk in chunks:
+                read += len(chunk)
+                pending.append(pool.apply_async(_tag_in_worker, (chunk, match, fmt)))
+                if len(pending) >= 2 * jobs:
+                    out.write(pending.popleft().get())
+            while pending:
+                out.write(pending.popleft().get())
+    finally:
+        shm.close()
+        shm.unlink()
+    return read
+
+def load_prefixes(path):
+    '''
+    returns IPv4NetworkArray from a snapshot written by IPv4NetworkArray.save
+    or from a text file with one network per line
+    '''
+    with open(path, 'rb') as f:
+        magic = f.read(len(IPv4NetworkArray.MAGIC))
+    if magic == IPv4NetworkArray.MAGIC:
+        return IPv4NetworkArray.load(path)
+    with open(path) as f:
+        return IPv4NetworkArray(line.strip() for line in f if line.strip())
+
+def main(argv=None):
+    import argparse
+    import sys
+    import time
+    parser = argparse.ArgumentParser(description='tag IPv4 and mac addresses found in log lines')
+    parser.add_argument('files', nargs='*', default=['-'], help="log files, '-' or none for stdin")
+    parser.add_argument('-p', '--prefixes', required=True, help='IPv4NetworkArray snapshot or text file with one network per line')
+    parser.add_argument('-m', '--match', choices=('longest', 'all'), default='longest', help='tag with the most specific network or with all of them')
+    parser.add_argument('-f', '--format', choices=('tsv', 'json'), default='tsv', dest='fmt')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('--chunk-size', type=int, default=1 << 22, help='bytes per chunk handed to a worker')
+    parser.add_argument('-q', '--quiet', action='store_true', help='do not report throughput on stderr')
+    args = parser.parse_args(argv)
+    nets = load_prefixes(args.prefixes)
+    start = time.perf_counter()
+    out = sys.stdout.buffer
+    read = enrich(args.files, nets, out, args.jobs, args.chunk_size, args.match, args.fmt)
+    out.flush()
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        print("%d bytes in %.2fs, %.1f MB/s" % (read, elapsed, read / elapsed / 1e6 if elapsed else 0), file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
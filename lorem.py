@@ -3,6 +3,11 @@ just a collection of variables filled with Lorem Ipsum
 ipsum = 1 paragraph
 ipsum_5 = 5 paragraphs
 ipsum_15 = 15 paragraphs
+
+and a seeded generator of any amount of lorem ipsum for load test payloads
+stream(size, unit, seed) = generator of memoryview chunks
+write_to(fd, size, seed) = writes size bytes straight to a file descriptor
+python lorem.py 10G > payload.txt
 '''
 
 ipsum = """Lorem ipsum dolor sit amet, consectetur adipiscing elit. In nec leo eget ligula fringilla malesuada. Aenean blandit, arcu vel consequat sagittis, elit sapien,
@@ -68,4 +73,126 @@ Vivamus eget neque ut ex blandit auctor. Sed rutrum placerat condimentum. Quisqu
 
 Nam maximus turpis et sodales malesuada. Praesent tincidunt aliquet libero ac congue. Cras pellentesque lacus ac magna faucibus ullamcorper. Integer sollicitudin cursus libero ac vehicula. Suspendisse lacinia, justo id lacinia maximus, odio lectus varius lectus, sed imperdiet eros nisi laoreet quam. Donec et massa et orci hendrerit dapibus in at tellus. Nunc ullamcorper a ante sit amet accumsan. Proin efficitur dolor in lorem gravida aliquam.
 
-Duis id eros quis augue molestie efficitur at sed tortor. Vestibulum vel lacinia odio, id auctor quam. Morbi at felis vulputate, lobortis velit eget, bibendum nisi. Ut maximus nisi sed odio fringilla bibendum. Phasellus urna tellus, congue eget augue ac, feugiat volutpat velit. Suspendisse auctor vulputate eros eu hendrerit. Vestibulum felis ligula, fermentum molestie egestas sit amet, eleifend quis felis. Mauris interdum, velit non mollis volutpat, sapien urna vestibulum elit, eu congue risus magna vel ex. Sed finibus ipsum non mauris tincidunt molestie. Proin eu dignissim leo. Duis nec turpis vitae turpis tempor sagittis. Phasellus eu interdum lacus, at efficitur felis. Etiam a velit et nibh sagittis finibus in eu ipsum. Sed velit mi, consectetur sagittis ultricies non, sodales a arcu. Aliquam eu ante sodales, pretium nibh non, faucibus ex."""
\ No newline at end of file
+Duis id eros quis augue molestie efficitur at sed tortor. Vestibulum vel lacinia odio, id auctor quam. Morbi at felis vulputate, lobortis velit eget, bibendum nisi. Ut maximus nisi sed odio fringilla bibendum. Phasellus urna tellus, congue eget augue ac, feugiat volutpat velit. Suspendisse auctor vulputate eros eu hendrerit. Vestibulum felis ligula, fermentum molestie egestas sit amet, eleifend quis felis. Mauris interdum, velit non mollis volutpat, sapien urna vestibulum elit, eu congue risus magna vel ex. Sed finibus ipsum non mauris tincidunt molestie. Proin eu dignissim leo. Duis nec turpis vitae turpis tempor sagittis. Phasellus eu interdum lacus, at efficitur felis. Etiam a velit et nibh sagittis finibus in eu ipsum. Sed velit mi, consectetur sagittis ultricies non, sodales a arcu. Aliquam eu ante sodales, pretium nibh non, faucibus ex."""
+
+
+from functools import lru_cache
+
+## bytes streams are runs of _SEGMENT bytes cut from one _BLOCK of text per seed,
+## so the output of a seed does not depend on the chunk size it is read with
+_BLOCK = 1 << 20
+_SEGMENT = 1 << 16
+## pools of this many seeds are kept, about 1.2 MB each
+_POOLS = 16
+
+@lru_cache(maxsize=_POOLS)
+def _pool(seed):
+    '''
+    returns (words, sentences, paragraphs, text) built from ipsum_15 for seed
+    words, sentences and paragraphs are lists of bytes, text is a bytes block
+    of paragraphs at least _BLOCK long, pools of the last _POOLS seeds are kept
+    '''
+    import random
+    r = random.Random(seed)
+    words = sorted({w.strip('.,').lower().encode('ascii') for w in ipsum_15.split()})
+    sentences = []
+    for _ in range(1024):
+        sentence = b' '.join(r.choices(words, k=r.randint(4, 16)))
+        sentences.append(sentence[:1].upper() + sentence[1:] + b'. ')
+    paragraphs = [b''.join(r.choices(sentences, k=r.randint(3, 8))).rstrip() + b'\n\n' for _ in range(128)]
+    text = bytearray()
+    while len(text) < _BLOCK:
+        text += r.choice(paragraphs)
+    return [w + b' ' for w in words], sentences, paragraphs, bytes(text)
+
+def stream(size=None, unit='bytes', seed=0, chunk=None, rate=None):
+    '''
+    generator of deterministic lorem ipsum, the same seed always gives the same output
+    whatever chunk size it is read with
+    :param size: total number of units, None streams forever
+    :param unit: bytes, words, sentences or paragraphs
+    :param chunk: units per yielded chunk, default 64 KiB for bytes and 1 otherwise
+    :param rate: if given, bytes per second the stream is held to
+    yields read only memoryview chunks, bytes chunks that fit in one segment
+    are views into a pregenerated block shared by every stream with the same seed,
+    larger or straddling chunks are joined from consecutive segments
+    arguments are checked when stream() is called, not on the first next()
+    '''
+    units = {'words': 0, 'sentences': 1, 'paragraphs': 2}
+    if unit != 'bytes' and unit not in units:
+        raise ValueError("Unknown unit: %s" % unit)
+    chunk = chunk or (_SEGMENT if unit == 'bytes' else 1)
+    pool = _pool(seed)
+    return _chunks(pool, None if unit == 'bytes' else pool[units[unit]], size, seed, chunk, rate)
+
+def _chunks(pool, choices, size, seed, chunk, rate):
+    '''
+    generator behind stream(), choices is None for bytes
+    '''
+    import random
+    import time
+    ## a separate generator for picking, so output only depends on seed
+    r = random.Random(seed)
+    text = memoryview(pool[3])
+    segment = text[:0]
+    remaining = size
+    sent = 0
+    start = time.monotonic()
+    while remaining is None or remaining > 0:
+        n = chunk if remaining is None else min(chunk, remaining)
+        if choices is None:
+            pieces = []
+            need = n
+            while need:
+                if not segment:
+                    offset = r.randrange(len(text) - _SEGMENT + 1)
+                    segment = text[offset:offset + _SEGMENT]
+                pieces.append(segment[:need])
+                need -= len(pieces[-1])
+                segment = segment[len(pieces[-1]):]
+            view = pieces[0] if len(pieces) == 1 else memoryview(b''.join(pieces))
+        else:
+            view = memoryview(b''.join(r.choices(choices, k=n)))
+        if remaining is not None:
+            remaining -= n
+        if rate:
+            sent += len(view)
+            ahead = sent / rate - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+        yield view
+
+def write_to(fd, size, seed=0, chunk=_SEGMENT, rate=None):
+    '''
+    writes size bytes of lorem ipsum straight to fd (a file descriptor or an object with fileno())
+    returns number of bytes written
+    '''
+    import os
+    if not isinstance(fd, int):
+        fd.flush()
+        fd = fd.fileno()
+    written = 0
+    for view in stream(size, 'bytes', seed, chunk, rate):
+        while view:
+            n = os.write(fd, view)
+            written += n
+            view = view[n:]
+    return written
+
+def _size(text):
+    '''
+    returns int of a size like 512, 64K, 10M or 2G
+    '''
+    text = text.strip().upper().rstrip('B')
+    scale = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30, 'T': 1 << 40}.get(text[-1:], 1)
+    return int(float(text.rstrip('KMGT')) * scale)
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description='write seeded lorem ipsum to stdout')
+    parser.add_argument('size', type=_size, help='bytes to write, e.g. 64K, 10M, 2G')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rate', type=_size, help='bytes per second')
+    args = parser.parse_args()
+    write_to(sys.stdout, args.size, args.seed, rate=args.rate)
@@ -1,4 +1,4 @@
-
+from collections.abc import MutableSequence
 
 
 ################# classes ##########################
@@ -6,9 +6,20 @@
 class MacAddress(object):
     '''
     A class for manipulating mac addresses
+    the address is held as a single 48 bit int, formatted forms and flags are computed on access
     '''
     ## endianness - big endian, little endian, group/multicast bit, global/admin bit, oui lookup
-    ## see also https://www.macvendorlookup.com/api - oui lookup
+    ## oui lookup is offline, see OUIIndex and compile_oui_index
+    import re
+    __slots__ = ('value',)
+    ## xx:xx:xx:xx:xx:xx, xxxx.xxxx.xxxx or xxxxxxxxxxxx
+    _MAC = '(?:[0-9A-Fa-f]{2}[-.:]){5}[0-9A-Fa-f]{2}|(?:[0-9A-Fa-f]{4}[-.:]){2}[0-9A-Fa-f]{4}|[0-9A-Fa-f]{12}'
+    _MAC_RE = re.compile(_MAC)
+    ## newline separated batch of macs, used by MacAddressArray
+    _MACS_RE = re.compile('(?:%s)(?:\n(?:%s))*' % (_MAC, _MAC))
+    _MAC_STRIP = str.maketrans('', '', '-.:')
+    ## byte value -> byte value with bit order reversed
+    _BITREV = bytes(int(format(i, '08b')[::-1], 2) for i in range(256))
     def __init__(self,mac):
         '''
         :param mac: a mac address
@@ -19,26 +30,50 @@ class MacAddress(object):
                     xxxx.xxxx.xxxx
                     xxxxxxxxxxxx
         '''
-        import re
-        ## if in xx:xx:xx:xx:xx:xx
-        if re.match('(?:[0-9A-Fa-f]{2}[-.:]){5}[0-9A-Fa-f]{2}',mac):
-            self.bytes = [x.lower() for x in re.split('[-.:]',mac)]
-        ## if in xxxx.xxxx.xxxx
-        elif re.match('(:?[0-9A-Fa-f]{4}[-.:]){2}[0-9A-Fa-f]{4}',mac):
-            self.bytes = [subel.lower() for el in re.split('[-.:]',mac) for subel in [el[i:i+2] for i in range(0,len(el),2)]]
-        ## if in xxxxxxxxxxxx
-        elif re.match('[0-9A-Fa-f]{12}',mac):
-            self.bytes = [mac[i:i+2] for i in range(0,len(mac),2)]
+        mac = mac.strip()
         ## default action is to raise exception
         ## and not create object
-        else:
+        if self._MAC_RE.fullmatch(mac) is None:
+            raise ValueError("Ethernet MAC not found")
+        self.value = int(mac.translate(self._MAC_STRIP), 16)
+    @classmethod
+    def from_int(cls, value):
+        '''
+        returns MacAddress for a 48 bit int without parsing a string
+        '''
+        if not 0 <= value < 1 << 48:
             raise ValueError("Ethernet MAC not found")
-        self.mac = self.form_a = '.'.join([self.bytes[i] + self.bytes[i+1] for i in range(0,len(self.bytes),2)])
-        self.form_b = ':'.join(self.bytes)
-        self._is_global()
-        self._is_group()
+        mac = cls.__new__(cls)
+        mac.value = value
+        return mac
+    def __int__(self):
+        return self.value
+    def __eq__(self, other):
+        return isinstance(other, MacAddress) and self.value == other.value
+    def __hash__(self):
+        return hash(self.value)
     def __repr__(self):
         return self.form_a
+    @property
+    def bytes(self):
+        '''
+        list of the six bytes as two digit hex strings
+        '''
+        return ['%02x' % b for b in self.value.to_bytes(6, 'big')]
+    @property
+    def form_a(self):
+        '''
+        xxxx.xxxx.xxxx
+        '''
+        h = '%012x' % self.value
+        return h[0:4] + '.' + h[4:8] + '.' + h[8:12]
+    mac = form_a
+    @property
+    def form_b(self):
+        '''
+        xx:xx:xx:xx:xx:xx
+        '''
+        return ':'.join(self.bytes)
     def bitswap_mac(self):
         '''
         swaps bit order for eachbyte of a mac
@@ -48,157 +83,1025 @@ class MacAddress(object):
         0xc1 -> 0x83
         etc...
         '''
-        reverse_bytes = []
-        for b in self.bytes:
-            ## bin string forward
-            bin1 = format(int(b,16),'08b')
-            ## bin string reversed
-            bin2 = bin1[-1::-1]
-            reverse_bytes.append(format(int(bin2,2),'02x'))
-        return '.'.join([reverse_bytes[i] + reverse_bytes[i+1] for i in range(0,len(reverse_bytes),2)])
-    def _is_group(self):
+        return MacAddress.from_int(int.from_bytes(self.value.to_bytes(6, 'big').translate(self._BITREV), 'big')).form_a
+    @property
+    def isGroup(self):
         '''
         checks the group/individual bit (least sig bit of first byte)
         1 = group (multicast)
         0 = individual (unicast)
         '''
-        if int(self.bytes[0], 16) & 1:
-            self.isGroup = True
-            self.isMulticast = True
-        else:
-            self.isGroup=False
-            self.isMulticast=False
-    def _is_global(self):
+        return bool(self.value >> 40 & 1)
+    isMulticast = isGroup
+    @property
+    def isGlobal(self):
         '''
         checks the global/local bit (next to least sig bit of first byte)
         1 = locally admin
         0 = globally unique
         '''
-        if int(self.bytes[0], 16) & 2:
-            self.isGlobal=False
-        else:
-            self.isGlobal=True
+        return not self.value >> 41 & 1
+    @property
+    def vendor(self):
+        '''
+        organization the mac is registered to, None if unknown
+        uses the index set by set_oui_index()
+        '''
+        return _oui_index().vendor(self.value)
+
+
+class MacAddressArray(object):
+    '''
+    holds a column of mac addresses as 48 bit ints in an array('Q')
+    parses a whole batch of strings in one pass, items are returned as MacAddress objects
+    bitswap_mac, isGroup and isGlobal work on the whole column at once
+    '''
+    def __init__(self, macs=()):
+        '''
+        :param macs: iterable of mac address strings in any form MacAddress accepts
+        '''
+        from array import array
+        self.macs = array('Q')
+        self.extend(macs)
+    @classmethod
+    def from_ints(cls, values):
+        '''
+        returns MacAddressArray of 48 bit ints without parsing
+        '''
+        new = cls()
+        new.macs.extend(values)
+        return new
+    def extend(self, macs):
+        '''
+        parses and appends a batch of mac address strings
+        '''
+        from itertools import repeat
+        macs = [m.strip() for m in macs]
+        if not macs:
+            return
+        text = '\n'.join(macs)
+        ## a newline inside an entry would split it into two macs
+        if text.count('\n') != len(macs) - 1 or MacAddress._MACS_RE.fullmatch(text) is None:
+            ## slow path only to name the offending entry
+            for m in macs:
+                if MacAddress._MAC_RE.fullmatch(m) is None:
+                    raise ValueError("Ethernet MAC not found: %s" % m)
+        self.macs.extend(map(int, text.translate(MacAddress._MAC_STRIP).split('\n'), repeat(16)))
+    def append(self, mac):
+        '''
+        appends a mac address string or MacAddress
+        '''
+        self.macs.append(mac.value if isinstance(mac, MacAddress) else MacAddress(mac).value)
+    def __len__(self):
+        return len(self.macs)
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return MacAddressArray.from_ints(self.macs[key])
+        return MacAddress.from_int(self.macs[key])
+    def __iter__(self):
+        return map(MacAddress.from_int, self.macs)
+    def __repr__(self):
+        return str([m.form_a for m in self])
+    def _column(self):
+        '''
+        returns numpy uint64 view of the column, or None without numpy
+        '''
+        np = _numpy()
+        return None if np is None else np.frombuffer(self.macs, dtype=np.uint64)
+    def bitswap_mac(self):
+        '''
+        returns new MacAddressArray with the bit order of every byte reversed
+        '''
+        from array import array
+        new = MacAddressArray()
+        ## every byte is reversed on its own, so byte order of the array does not matter
+        ## and the two unused high bytes stay zero
+        new.macs = array('Q', self.macs.tobytes().translate(MacAddress._BITREV))
+        return new
+    def _flag(self, shift):
+        from array import array
+        np = _numpy()
+        column = self._column()
+        if column is not None:
+            return (column >> np.uint64(shift) & np.uint64(1)).astype(bool)
+        return array('B', [v >> shift & 1 for v in self.macs])
+    def isGroup(self):
+        '''
+        returns group (multicast) flag of every mac
+        numpy bool array when numpy is available, else array('B') of 0/1
+        '''
+        return self._flag(40)
+    isMulticast = isGroup
+    def isGlobal(self):
+        '''
+        returns globally unique flag of every mac
+        numpy bool array when numpy is available, else array('B') of 0/1
+        '''
+        local = self._flag(41)
+        np = _numpy()
+        if np is not None:
+            return ~local
+        from array import array
+        return array('B', [not v for v in local])
+    def vendor_many(self):
+        '''
+        returns list of the organization of every mac, None where unknown
+        uses the index set by set_oui_index()
+        '''
+        return _oui_index().vendor_many(self.macs)
+
+
+class OUIIndex(object):
+    '''
+    offline mac vendor lookup over an index file built by compile_oui_index()
+    the file is memory mapped, so opening is cheap and pages are only read when touched
+    lookups binary search the MA-S (36 bit), MA-M (28 bit) and MA-L (24 bit) registries
+    and are cached per 24 bit OUI, or per 36 bit prefix where the OUI is subdivided
+    file layout, little endian:
+    header   4s magic, H version, 2x, 3I record counts for 24, 28 and 36 bit prefixes
+    records  per prefix length, sorted: Q prefix, I name offset, H name length
+    names    utf-8 organization names, each stored once
+    '''
+    MAGIC = b'OUIX'
+    VERSION = 1
+    import struct
+    HEADER = struct.Struct('<4sH2x3I')
+    RECORD = struct.Struct('<QIH')
+    PREFIX = struct.Struct('<Q')
+    BITS = (24, 28, 36)
+    def __init__(self, path, cache_size=65536):
+        '''
+        :param path: index file built by compile_oui_index()
+        :param cache_size: entries kept by each of the two lru caches
+        '''
+        import mmap
+        from functools import lru_cache
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, *counts = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("Not a OUI index file: %s" % path)
+        self.sections = {}
+        offset = self.HEADER.size
+        for bits, count in zip(self.BITS, counts):
+            self.sections[bits] = (offset, count)
+            offset += count * self.RECORD.size
+        self._names = offset
+        self._oui = lru_cache(cache_size)(self._resolve_oui)
+        self._fine = lru_cache(cache_size)(self._resolve_fine)
+    def close(self):
+        self._map.close()
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+    def _search(self, bits, prefix):
+        '''
+        returns index of the first record of section bits with a prefix >= prefix
+        and that record's prefix, or None past the end
+        '''
+        offset, count = self.sections[bits]
+        size = self.RECORD.size
+        lo, hi = 0, count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.PREFIX.unpack_from(self._map, offset + mid * size)[0] < prefix:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo == count:
+            return lo, None
+        return lo, self.PREFIX.unpack_from(self._map, offset + lo * size)[0]
+    def _name(self, bits, i):
+        _, name_offset, name_len = self.RECORD.unpack_from(self._map, self.sections[bits][0] + i * self.RECORD.size)
+        start = self._names + name_offset
+        return self._map[start:start + name_len].decode('utf-8')
+    def _find(self, bits, prefix):
+        i, found = self._search(bits, prefix)
+        return self._name(bits, i) if found == prefix else None
+    def _resolve_oui(self, oui):
+        '''
+        returns (MA-L name or None, True if the OUI has MA-M/MA-S assignments)
+        '''
+        subdivided = False
+        for bits in (28, 36):
+            shift = bits - 24
+            found = self._search(bits, oui << shift)[1]
+            if found is not None and found >> shift == oui:
+                subdivided = True
+        return self._find(24, oui), subdivided
+    def _resolve_fine(self, prefix36):
+        '''
+        returns name for the most specific assignment covering a 36 bit prefix
+        '''
+        for bits in (36, 28, 24):
+            name = self._find(bits, prefix36 >> (36 - bits))
+            if name is not None:
+                return name
+        return None
+    def vendor(self, mac):
+        '''
+        returns organization for a mac (MacAddress, 48 bit int or string), None if unknown
+        '''
+        if not isinstance(mac, int):
+            mac = (mac if isinstance(mac, MacAddress) else MacAddress(mac)).value
+        name, subdivided = self._oui(mac >> 24)
+        if subdivided:
+            return self._fine(mac >> 12)
+        return name
+    def vendor_many(self, macs):
+        '''
+        returns list of organizations for an iterable of macs, None where unknown
+        '''
+        return [self.vendor(mac) for mac in macs]
+
+
+class _TrieNode(object):
+    '''
+    one node of a _PrefixTrie
+    count is the number of times the prefix was inserted
+    nodes with a count of 0 are glue nodes created by a split
+    '''
+    __slots__ = ('net', 'plen', 'count', 'children')
+    def __init__(self, net, plen, count=0):
+        self.net = net
+        self.plen = plen
+        self.count = count
+        self.children = [None, None]
+
+
+class _PrefixTrie(object):
+    '''
+    compressed binary radix (patricia) trie of prefixes held as integers
+    lookups walk at most bits nodes regardless of how many prefixes are stored
+    duplicate prefixes are counted, not stored twice
+    '''
+    def __init__(self, bits=32):
+        self.bits = bits
+        self.root = _TrieNode(0, 0)
+    def _common(self, a, b):
+        '''
+        returns number of leading bits a and b have in common
+        '''
+        return self.bits - (a ^ b).bit_length()
+    def insert(self, net, plen):
+        '''
+        adds prefix net/plen
+        '''
+        node = self.root
+        while True:
+            if plen == node.plen:
+                node.count += 1
+                return
+            bit = (net >> (self.bits - 1 - node.plen)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _TrieNode(net, plen, 1)
+                return
+            common = min(plen, child.plen, self._common(net, child.net))
+            if common == child.plen:
+                node = child
+                continue
+            if common == plen:
+                ## new prefix sits above child
+                new = _TrieNode(net, plen, 1)
+                new.children[(child.net >> (self.bits - 1 - plen)) & 1] = child
+                node.children[bit] = new
+                return
+            ## prefixes diverge below common, add a glue node
+            mask = ((1 << common) - 1) << (self.bits - common)
+            glue = _TrieNode(net & mask, common)
+            glue.children[(child.net >> (self.bits - 1 - common)) & 1] = child
+            glue.children[(net >> (self.bits - 1 - common)) & 1] = _TrieNode(net, plen, 1)
+            node.children[bit] = glue
+            return
+    def remove(self, net, plen):
+        '''
+        removes one occurrence of prefix net/plen
+        raises KeyError if prefix is not in the trie
+        '''
+        path = [self.root]
+        while path[-1].plen < plen:
+            node = path[-1].children[(net >> (self.bits - 1 - path[-1].plen)) & 1]
+            if node is None or node.plen > plen:
+                raise KeyError((net, plen))
+            path.append(node)
+        node = path.pop()
+        if node.net != net or not node.count:
+            raise KeyError((net, plen))
+        node.count -= 1
+        ## prune empty nodes so the trie stays compressed
+        while path and not node.count:
+            kids = [c for c in node.children if c is not None]
+            if len(kids) > 1:
+                return
+            parent = path.pop()
+            parent.children[parent.children.index(node)] = kids[0] if kids else None
+            node = parent
+    def __contains__(self, prefix):
+        '''
+        exact match of (net, plen)
+        '''
+        net, plen = prefix
+        for node in self.matches(net, plen):
+            if node.plen == plen:
+                return True
+        return False
+    def matches(self, ip, maxlen=None):
+        '''
+        yields nodes of every prefix covering ip, least specific first
+        maxlen stops the walk at that prefix length
+        '''
+        if maxlen is None:
+            maxlen = self.bits
+        node = self.root
+        if node.count:
+            yield node
+        while node.plen < maxlen:
+            node = node.children[(ip >> (self.bits - 1 - node.plen)) & 1]
+            if node is None or node.plen > maxlen or (ip ^ node.net) >> (self.bits - node.plen):
+                return
+            if node.count:
+                yield node
+    def longest(self, ip):
+        '''
+        returns node of the most specific prefix covering ip or None
+        '''
+        best = None
+        for best in self.matches(ip):
+            pass
+        return best
 
 
-class IPv4NetworkArray(list):
+class IPv4NetworkArray(MutableSequence):
     '''
     holds a list of networks
+    a MutableSequence, not a list: list() it where a real list is needed
+    networks are parsed once and held as packed ints, network address in an array('I')
+    and prefix length in an array('B'), strings are only built when items are read
+    save() and load() keep the packed form in a binary snapshot that opens without parsing
+    build_index() adds a prefix trie that keeps lookups at O(32)
+    contains_many(), match_many() and find_all_many() answer whole batches of addresses at once
+    union (|), intersection (&), difference (-) and overlaps return collapsed networks
     '''
     import ipaddress
+    import socket
+    import struct
+    ## snapshot header: magic, version, flags, number of networks
+    SNAPSHOT = struct.Struct('<4sHHQ')
+    MAGIC = b'IPNA'
+    VERSION = 1
+    ## flag set when the interval table follows the prefix lengths
+    INDEXED = 1
+    ## interval table header: number of intervals, columns follow as (type code, rows)
+    INTERVALS = struct.Struct('<Q')
+    _COLUMNS = (('I', 'intervals'), ('I', 'intervals'), ('q', 'intervals'), ('q', 'networks'))
+    _MASKS = [((1 << p) - 1) << (32 - p) for p in range(33)]
     def __init__(self, *args, **kwargs):
         '''
         '''
-        super().__init__(*args, **kwargs)
-        self.netlist=[]
+        from array import array
+        self._nets = array('I')
+        self._plens = array('B')
+        self._trie = None
+        self._intervals = None
+        self._map = None
+        if args or kwargs:
+            self.extend(*args, **kwargs)
+    def _parse(self, value):
+        '''
+        returns (network int, prefix length) of value
+        dotted quad strings with an optional /len and (int, len) tuples are handled
+        without ipaddress, anything else IPv4Network accepts goes through IPv4Network
+        '''
+        if isinstance(value, str):
+            address, slash, plen = value.partition('/')
+            if not slash:
+                plen = '32'
+            if plen.isascii() and plen.isdigit() and int(plen) <= 32:
+                try:
+                    net = int.from_bytes(self.socket.inet_pton(self.socket.AF_INET, address), 'big')
+                except OSError:
+                    raise ValueError("Not a IP network or format incorrect: %s" % value)
+                value = (net, int(plen))
+        if type(value) is tuple and len(value) == 2 and type(value[0]) is int and type(value[1]) is int:
+            net, plen = value
+            if 0 <= net < 1 << 32 and 0 <= plen <= 32:
+                if net & ~self._MASKS[plen]:
+                    raise ValueError("%s has host bits set" % self._str(net, plen))
+                return net, plen
+        if isinstance(value, self.ipaddress.IPv4Network):
+            return int(value.network_address), value.prefixlen
         try:
-            for n in self:
-                self.netlist.append(self.ipaddress.IPv4Network(n))
+            ipnet = self.ipaddress.IPv4Network(value)
         except (self.ipaddress.AddressValueError, self.ipaddress.NetmaskValueError):
-            raise ValueError("Not a IP network or format incorrect: %s" % n)
+            raise ValueError("Not a IP network or format incorrect: %s" % (value,))
+        return int(ipnet.network_address), ipnet.prefixlen
+    def _str(self, net, plen):
+        '''
+        returns string of a packed network
+        '''
+        return '%s/%d' % (self.socket.inet_ntoa(net.to_bytes(4, 'big')), plen)
+    def _pairs(self):
+        '''
+        iterator of (network int, prefix length)
+        '''
+        return zip(self._nets, self._plens)
+    def _writable(self):
+        '''
+        copies memory mapped storage into arrays before the first change
+        and drops indexes that depend on positions
+        '''
+        from array import array
+        self._intervals = None
+        if not isinstance(self._nets, array) or not isinstance(self._plens, array):
+            nets, plens = array('I'), array('B')
+            nets.frombytes(memoryview(self._nets).cast('B'))
+            plens.frombytes(self._plens)
+            self._nets, self._plens, self._map = nets, plens, None
+    @property
+    def netlist(self):
+        '''
+        list of IPv4Network objects, built on every access
+        '''
+        return [self.ipaddress.IPv4Network(pair) for pair in self._pairs()]
+    def build_index(self):
+        '''
+        builds a prefix trie over the array
+        __contains__, find_all_nets_for_ip and longest_match then use it
+        the trie is kept in sync by every method that changes the array
+        '''
+        self._trie = _PrefixTrie(32)
+        for net, plen in self._pairs():
+            self._trie.insert(net, plen)
+        return self
+    def drop_index(self):
+        '''
+        discards the prefix trie, lookups go back to scanning the list
+        '''
+        self._trie = None
+    def _index_add(self, pairs):
+        if self._trie is not None:
+            for net, plen in pairs:
+                self._trie.insert(net, plen)
+    def _index_remove(self, pairs):
+        if self._trie is not None:
+            for net, plen in pairs:
+                self._trie.remove(net, plen)
+    def _interval_table(self):
+        '''
+        returns (starts, ends, owners, parents) describing the address space as sorted,
+        disjoint intervals, each owned by the index of its most specific network
+        parents holds for every network the index of the network directly around it, -1 if none,
+        so following parents from an owner visits every network containing an address
+        built on first use and dropped whenever the array changes
+        '''
+        if self._intervals is not None:
+            return self._intervals
+        from array import array
+        ## outer networks first, for duplicates the lowest index ends up innermost
+        items = sorted((net, plen, -i) for i, (net, plen) in enumerate(self._pairs()))
+        starts, ends, owners = array('I'), array('I'), array('q')
+        parents = array('q', [-1]) * len(self)
+        def emit(lo, hi, owner):
+            starts.append(lo)
+            ends.append(hi)
+            owners.append(owner)
+        stack = []
+        cur = 0
+        for start, plen, negi in items:
+            while stack and stack[-1][0] < start:
+                end, owner = stack.pop()
+                if cur <= end:
+                    emit(cur, end, owner)
+                    cur = end + 1
+            if stack and cur < start:
+                emit(cur, start - 1, stack[-1][1])
+            if stack:
+                parents[-negi] = stack[-1][1]
+            cur = start
+            stack.append((start | ((1 << (32 - plen)) - 1), -negi))
+        while stack:
+            end, owner = stack.pop()
+            if cur <= end:
+                emit(cur, end, owner)
+                cur = end + 1
+        np = _numpy()
+        if np is not None:
+            starts = np.frombuffer(starts, dtype=np.uint32)
+            ends = np.frombuffer(ends, dtype=np.uint32)
+            owners = np.frombuffer(owners, dtype=np.int64)
+            parents = np.frombuffer(parents, dtype=np.int64)
+        self._intervals = (starts, ends, owners, parents)
+        return self._intervals
+    def __len__(self, /):
+        return len(self._plens)
+    def __iter__(self, /):
+        return map(self._str, self._nets, self._plens)
+    def __reversed__(self, /):
+        return map(self._str, reversed(self._nets), reversed(self._plens))
     def __getitem__(self, key, /):
         '''
-        returns the string value of IPv4Network object
+        returns the string value of the network
+        a slice returns a new IPv4NetworkArray
         '''
-        return str(self.netlist.__getitem__(key))
+        if isinstance(key, slice):
+            return IPv4NetworkArray._from_arrays(self._nets[key], self._plens[key])
+        return self._str(self._nets[key], self._plens[key])
     def __repr__(self, /):
         '''
         returns string rep of a list with values converted to IPv4Network object string representations
         '''
-        return str([str(i) for i in self.netlist])
+        return str(list(self))
+    def __eq__(self, value, /):
+        if isinstance(value, IPv4NetworkArray):
+            return list(self._nets) == list(value._nets) and list(self._plens) == list(value._plens)
+        return list(self) == value
+    def __ne__(self, value, /):
+        return not self == value
+    def __reduce__(self):
+        return (IPv4NetworkArray.from_buffer, (self.tobytes(),))
+    @classmethod
+    def _from_arrays(cls, nets, plens):
+        '''
+        returns new instance holding copies of packed storage, nothing is parsed
+        '''
+        from array import array
+        new = cls()
+        new._nets = array('I', nets)
+        new._plens = array('B', plens)
+        return new
+    def copy(self, /):
+        return IPv4NetworkArray._from_arrays(self._nets, self._plens)
+    __copy__ = copy
     def __add__(self, value):
         '''
         returns IPv4NetworkArray instance of self + value
+        value is only parsed if it is not already a IPv4NetworkArray
         '''
-        return(IPv4NetworkArray(super().__add__(value)))
+        new = self.copy()
+        new.extend(value)
+        return new
+    def __iadd__(self, value):
+        self.extend(value)
+        return self
     def __contains__(self,ipadd):
         '''
         func to check list of nets at once
         '''
+        ip = None
+        if isinstance(ipadd, str):
+            try:
+                ip = int.from_bytes(self.socket.inet_pton(self.socket.AF_INET, ipadd), 'big')
+            except OSError:
+                pass
+        elif isinstance(ipadd, (int, self.ipaddress.IPv4Address)):
+            ip = self._address(ipadd)
+        if ip is None:
+            ## not an address, check for the network itself
+            net, plen = self._parse_lookup(ipadd)
+            if self._trie is not None:
+                return (net, plen) in self._trie
+            return any(n == net and p == plen for n, p in self._pairs())
+        if self._trie is not None:
+            return self._trie.longest(ip) is not None
+        masks = self._MASKS
+        return any(ip & masks[p] == n for n, p in self._pairs())
+    def _parse_lookup(self, value):
         try:
-            ipadd = self.ipaddress.IPv4Address(ipadd)
-            for n in self.netlist:
-                if ipadd in n:
-                    return True
-        except self.ipaddress.AddressValueError:
+            return self._parse(value)
+        except ValueError:
+            raise ValueError("Not a IP address or IP network or format incorrect: %s" % (value,))
+    def _address(self, ipadd):
+        '''
+        returns int of an IPv4 address given as string, int or IPv4Address
+        '''
+        if isinstance(ipadd, str):
             try:
-                ipnet = self.ipaddress.IPv4Network(ipadd)
-                if ipnet in self.netlist:
-                    return True
-            except (self.ipaddress.AddressValueError, self.ipaddress.NetmaskValueError):
-                raise ValueError("Not a IP address or IP network or format incorrect: %s" % ipadd)
-        return False
+                return int.from_bytes(self.socket.inet_pton(self.socket.AF_INET, ipadd), 'big')
+            except OSError:
+                pass
+        try:
+            return int(self.ipaddress.IPv4Address(ipadd))
+        except (self.ipaddress.AddressValueError, self.ipaddress.NetmaskValueError):
+            raise ValueError("Not a IP address or IP network or format incorrect: %s" % ipadd)
     def __delitem__(self, key, /):
         '''
         delete self[key]
-        there is (currently) no sanity check between self and self.netlist
-        if you muck about self.netlist, the object will not behave well
         '''
-        super().__delitem__(key)
-        self.netlist.__delitem__(key)
+        self._writable()
+        if isinstance(key, slice):
+            removed = list(zip(self._nets[key], self._plens[key]))
+        else:
+            removed = [(self._nets[key], self._plens[key])]
+        del self._nets[key]
+        del self._plens[key]
+        self._index_remove(removed)
     def __setitem__(self, key, value, /):
         '''
         sets self[key] = value
+        a slice takes an iterable of networks
         '''
-        try:
-            ipnet = self.ipaddress.IPv4Network(value)
-        except (self.ipaddress.AddressValueError, self.ipaddress.NetmaskValueError):
-            raise ValueError("Not a IP network or format incorrect: %s" % value)
-        super().__setitem__(key,value)
-        self.netlist[key] = ipnet
+        from array import array
+        if isinstance(key, slice):
+            pairs = [self._parse(v) for v in value]
+            self._writable()
+            removed = list(zip(self._nets[key], self._plens[key]))
+            self._nets[key] = array('I', [net for net, _ in pairs])
+            self._plens[key] = array('B', [plen for _, plen in pairs])
+        else:
+            pairs = [self._parse(value)]
+            self._writable()
+            removed = [(self._nets[key], self._plens[key])]
+            self._nets[key], self._plens[key] = pairs[0]
+        self._index_remove(removed)
+        self._index_add(pairs)
     def _overridden_error(self):
         raise AttributeError()
-        
+
     def append(self, obj):
         '''
         appends to list
         '''
-        try:
-            self.netlist.append(self.ipaddress.IPv4Network(obj))
-        except (self.ipaddress.AddressValueError, self.ipaddress.NetmaskValueError):
-            raise ValueError("Not a IP network or format incorrect: %s" % obj)
+        pair = self._parse(obj)
+        self._writable()
+        self._nets.append(pair[0])
+        self._plens.append(pair[1])
+        self._index_add([pair])
+    def extend(self, iterable):
+        '''
+        appends every network of iterable
+        another IPv4NetworkArray is copied without parsing
+        '''
+        if isinstance(iterable, IPv4NetworkArray):
+            nets, plens = iterable._nets, iterable._plens
         else:
-            super().append(obj)
+            from array import array
+            nets, plens = array('I'), array('B')
+            for n in iterable:
+                net, plen = self._parse(n)
+                nets.append(net)
+                plens.append(plen)
+        added = list(zip(nets, plens)) if self._trie is not None else ()
+        self._writable()
+        self._nets.extend(nets)
+        self._plens.extend(plens)
+        self._index_add(added)
+    def insert(self, index, obj, /):
+        '''
+        inserts before index
+        '''
+        pair = self._parse(obj)
+        self._writable()
+        self._nets.insert(index, pair[0])
+        self._plens.insert(index, pair[1])
+        self._index_add([pair])
+    def index(self, value, /, *args):
+        '''
+        returns first index of a network
+        '''
+        net, plen = self._parse(value)
+        for i, pair in enumerate(self._pairs()):
+            if pair == (net, plen) and (not args or args[0] <= i < (args[1] if len(args) > 1 else len(self))):
+                return i
+        raise ValueError("%s is not in list" % (value,))
+    def count(self, value, /):
+        '''
+        returns number of occurrences of a network
+        '''
+        pair = self._parse(value)
+        return sum(1 for p in self._pairs() if p == pair)
+    def remove(self, value, /):
+        '''
+        removes first occurrence of a network
+        '''
+        del self[self.index(value)]
+    def clear(self, /):
+        self._writable()
+        del self._nets[:]
+        del self._plens[:]
+        if self._trie is not None:
+            self.build_index()
+    def reverse(self, /):
+        self._writable()
+        self._nets.reverse()
+        self._plens.reverse()
     def sort(self, /, *, key=None, reverse=False):
         '''
-        sorts array in place
+        sorts array in place, by network address then prefix length
+        key, if given, is called with IPv4Network objects
         '''
-        super().sort(key = lambda x: self.ipaddress.IPv4Network(x),reverse=reverse)
-        self.netlist.sort(key=key,reverse=reverse)
+        from array import array
+        self._writable()
+        if key is not None:
+            pairs = sorted(self._pairs(), key=lambda pair: key(self.ipaddress.IPv4Network(pair)), reverse=reverse)
+            self._nets = array('I', [net for net, _ in pairs])
+            self._plens = array('B', [plen for _, plen in pairs])
+            return
+        ## network and prefix length packed into one int sort as a single array
+        packed = sorted(array('Q', [net << 6 | plen for net, plen in self._pairs()]), reverse=reverse)
+        self._nets = array('I', [p >> 6 for p in packed])
+        self._plens = array('B', [p & 63 for p in packed])
     def pop(self, /, *, ipnetobject=False):
         '''
-        returns self[-1] or self.netlist[-1] while retaining parity of each
-        assumes order has not been adjusted manually
+        removes and returns self[-1]
         if ipnetobject is True, returns IPv4Network object, else string
         '''
+        self._writable()
+        pair = self._nets.pop(), self._plens.pop()
+        self._index_remove([pair])
         if ipnetobject:
-            super().pop()
-            return self.netlist.pop()
-        else:
-            self.netlist.pop()
-            return super().pop()
+            return self.ipaddress.IPv4Network(pair)
+        return self._str(*pair)
     def new_sort(self, /, *, key=None, reverse=False):
         '''
         returns a new instance of Network Array object
         sorted(networkarray) will return a list
         '''
-        new = IPv4NetworkArray(self)
+        new = self.copy()
         new.sort(key=key,reverse=reverse)
+        if self._trie is not None:
+            new.build_index()
         return new
     def find_all_nets_for_ip(self, ipadd):
         '''
         returns intance of IPv4NetworkArray of networks a given IP is found in
+        ordered least specific first, a network listed more than once is returned once per occurrence
+        the order is the same with or without build_index()
         '''
-        returnlist = []
-        try:
-            ipadd = self.ipaddress.IPv4Address(ipadd)
-        except (self.ipaddress.AddressValueError, self.ipaddress.NetmaskValueError):
-            raise ValueError("Not a IP address or IP network or format incorrect: %s" % ipadd)
-        for n in self.netlist:
-            if ipadd in n:
-                returnlist.append(str(n))
-        return IPv4NetworkArray(returnlist)
+        from array import array
+        ip = self._address(ipadd)
+        if self._trie is not None:
+            ## trie yields least specific first, duplicates once per occurrence
+            found = [(node.net, node.plen) for node in self._trie.matches(ip) for _ in range(node.count)]
+        else:
+            ## networks containing one address are nested, so prefix length alone orders them
+            masks = self._MASKS
+            found = sorted(((n, p) for n, p in self._pairs() if ip & masks[p] == n), key=lambda pair: pair[1])
+        return IPv4NetworkArray._from_arrays(array('I', [n for n, _ in found]), array('B', [p for _, p in found]))
+    def longest_match(self, ipadd):
+        '''
+        returns string of the most specific network a given IP is found in
+        returns None if no network contains the IP
+        '''
+        ip = self._address(ipadd)
+        if self._trie is not None:
+            node = self._trie.longest(ip)
+            return None if node is None else self._str(node.net, node.plen)
+        masks = self._MASKS
+        best = None
+        for n, p in self._pairs():
+            if ip & masks[p] == n and (best is None or p > best[1]):
+                best = (n, p)
+        return None if best is None else self._str(*best)
+    def _other(self, other):
+        '''
+        returns networks of other, without re-parsing another IPv4NetworkArray
+        a str is a single network, never a path
+        '''
+        if isinstance(other, IPv4NetworkArray):
+            return other._pairs()
+        return [other] if isinstance(other, str) else other
+    def union(self, other):
+        '''
+        returns IPv4NetworkArray of the fewest networks covering self and other
+        '''
+        return IPv4NetworkArray(network_union(self._pairs(), self._other(other)))
+    def intersection(self, other):
+        '''
+        returns IPv4NetworkArray of the fewest networks covering the addresses in both self and other
+        '''
+        return IPv4NetworkArray(network_intersection(self._pairs(), self._other(other)))
+    def difference(self, other):
+        '''
+        returns IPv4NetworkArray of the fewest networks covering the addresses in self but not in other
+        '''
+        return IPv4NetworkArray(network_difference(self._pairs(), self._other(other)))
+    def overlaps(self, other):
+        '''
+        returns IPv4NetworkArray of the networks of self that share any address with other
+        '''
+        return IPv4NetworkArray(network_overlaps(self._pairs(), self._other(other)))
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+    def tobytes(self, index=False):
+        '''
+        returns the binary snapshot of the array, see save()
+        '''
+        import sys
+        from array import array
+        nets = array('I', self._nets)
+        if sys.byteorder == 'big':
+            nets.byteswap()
+        parts = [self.SNAPSHOT.pack(self.MAGIC, self.VERSION, self.INDEXED if index else 0, len(self)),
+                 nets.tobytes(), bytes(self._plens)]
+        if index:
+            table = self._interval_table()
+            parts.append(bytes(-sum(map(len, parts)) % 8))
+            parts.append(self.INTERVALS.pack(len(table[0])))
+            np = _numpy()
+            for (code, _), column in zip(self._COLUMNS, table):
+                if np is not None:
+                    parts.append(np.asarray(column, dtype='<u4' if code == 'I' else '<i8').tobytes())
+                else:
+                    column = array(code, column)
+                    if sys.byteorder == 'big':
+                        column.byteswap()
+                    parts.append(column.tobytes())
+        return b''.join(parts)
+    def save(self, path, index=False):
+        '''
+        writes a binary snapshot of the array to path
+        header, then little endian network addresses (4 bytes each), then prefix lengths (1 byte each)
+        with index the interval table used by match_many and find_all_many follows, 8 byte aligned:
+        number of intervals, then interval starts and ends (4 bytes each), owners (8 bytes each)
+        and the parent of every network (8 bytes each), so a loaded snapshot answers lookups
+        without building anything
+        '''
+        with open(path, 'wb') as f:
+            f.write(self.tobytes(index))
+    @classmethod
+    def from_buffer(cls, buffer):
+        '''
+        returns IPv4NetworkArray over a snapshot held in buffer (bytes, mmap, shared memory)
+        nothing is parsed, on little endian hosts the buffer is used in place
+        until the array is first changed, an interval table saved with the
+        snapshot is used in place as well instead of being rebuilt
+        '''
+        view = memoryview(buffer).cast('B')
+        if len(view) < cls.SNAPSHOT.size:
+            raise ValueError("Not a IPv4NetworkArray snapshot")
+        magic, version, flags, count = cls.SNAPSHOT.unpack_from(view, 0)
+        start = cls.SNAPSHOT.size
+        if magic != cls.MAGIC or version != cls.VERSION or len(view) < start + 5 * count:
+            raise ValueError("Not a IPv4NetworkArray snapshot")
+        new = cls()
+        new._nets = cls._column(view[start:start + 4 * count], 'I')
+        new._plens = view[start + 4 * count:start + 5 * count]
+        if flags & cls.INDEXED:
+            start += 5 * count
+            start += -start % 8
+            if len(view) < start + cls.INTERVALS.size:
+                raise ValueError("Not a IPv4NetworkArray snapshot")
+            rows = {'intervals': cls.INTERVALS.unpack_from(view, start)[0], 'networks': count}
+            start += cls.INTERVALS.size
+            np = _numpy()
+            table = []
+            for code, size in cls._COLUMNS:
+                end = start + (4 if code == 'I' else 8) * rows[size]
+                if len(view) < end:
+                    raise ValueError("Not a IPv4NetworkArray snapshot")
+                if np is not None:
+                    ## match_many works on numpy arrays when numpy is there
+                    table.append(np.frombuffer(view[start:end], dtype='<u4' if code == 'I' else '<i8'))
+                else:
+                    table.append(cls._column(view[start:end], code))
+                start = end
+            new._intervals = tuple(table)
+        return new
+    @staticmethod
+    def _column(view, code):
+        '''
+        returns a little endian column of a snapshot as a view of the buffer
+        on little endian hosts, else as a byte swapped array copy
+        '''
+        import sys
+        from array import array
+        if sys.byteorder == 'little' and array(code).itemsize == (4 if code == 'I' else 8):
+            column = view.cast(code)
+        else:
+            column = array(code)
+            column.frombytes(view)
+            if sys.byteorder == 'big':
+                column.byteswap()
+        return column
+    @classmethod
+    def load(cls, path, mmap=True):
+        '''
+        returns IPv4NetworkArray from a snapshot written by save()
+        with mmap the file is memory mapped and only read as it is used,
+        otherwise it is read into memory, either way nothing is parsed
+        '''
+        import mmap as _mmap
+        with open(path, 'rb') as f:
+            if not mmap:
+                return cls.from_buffer(f.read())
+            mapped = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+        new = cls.from_buffer(mapped)
+        new._map = mapped
+        return new
+    def match_many(self, ips):
+        '''
+        returns the index of the most specific network for every address in ips, -1 if none
+        ips may be a list of strings or ints, a numpy integer array
+        or a buffer of packed (network byte order) 4 byte addresses
+        returns a numpy int64 array when numpy is available, else array('q')
+        '''
+        starts, ends, owners, _ = self._interval_table()
+        ips = _ipv4_ints(ips)
+        np = _numpy()
+        if np is not None:
+            pos = np.searchsorted(starts, ips, side='right') - 1
+            hit = pos >= 0
+            np.maximum(pos, 0, out=pos)
+            if len(starts):
+                hit &= ips <= ends[pos]
+                return np.where(hit, owners[pos], -1)
+            return np.full(len(ips), -1, dtype=np.int64)
+        from array import array
+        from bisect import bisect_right
+        result = array('q')
+        for ip in ips:
+            pos = bisect_right(starts, ip) - 1
+            result.append(owners[pos] if pos >= 0 and ip <= ends[pos] else -1)
+        return result
+    def find_all_many(self, ips):
+        '''
+        returns for every address in ips a list of the indexes of the networks containing it,
+        least specific first, a network listed more than once is returned once per occurrence
+        accepts the same input as match_many and answers from the same interval table,
+        so a table loaded with a snapshot needs no build_index()
+        '''
+        parents = self._interval_table()[3]
+        result = []
+        for i in self.match_many(ips).tolist():
+            found = []
+            while i >= 0:
+                found.append(i)
+                i = int(parents[i])
+            found.reverse()
+            result.append(found)
+        return result
+    def contains_many(self, ips):
+        '''
+        returns a mask telling for every address in ips whether any network contains it
+        accepts the same input as match_many
+        returns a numpy bool array when numpy is available, else array('B') of 0/1
+        '''
+        matches = self.match_many(ips)
+        np = _numpy()
+        if np is not None:
+            return matches >= 0
+        from array import array
+        return array('B', [m >= 0 for m in matches])
         
         
+class Stats(object):
+    '''
+    call counts, latency histograms, cache hit rates and parse failures
+    collected while instrumentation is on, see enable_stats() and profiling()
+    latencies go into power of two nanosecond buckets
+    calls and latencies cover calls that returned, failures are counted apart and not timed
+    '''
+    def __init__(self):
+        self.reset()
+    def reset(self):
+        ## name -> [calls, failures, total ns, min ns, max ns, bucket counts]
+        self.calls = {}
+        ## name -> [hits, misses]
+        self.caches = {}
+    def _entry(self, name):
+        ## min ns stays None until a call returns, failures only bump the failure count
+        entry = self.calls.get(name)
+        if entry is None:
+            entry = self.calls[name] = [0, 0, 0, None, 0, [0] * 64]
+        return entry
+    def record(self, name, elapsed):
+        entry = self._entry(name)
+        entry[0] += 1
+        entry[2] += elapsed
+        if entry[3] is None or elapsed < entry[3]:
+            entry[3] = elapsed
+        if elapsed > entry[4]:
+            entry[4] = elapsed
+        entry[5][min(elapsed.bit_length(), 63)] += 1
+    def failure(self, name):
+        self._entry(name)[1] += 1
+    def cache(self, name, hit):
+        self.caches.setdefault(name, [0, 0])[0 if hit else 1] += 1
+    def snapshot(self):
+        '''
+        returns a plain dict of everything collected
+        histogram keys are bucket upper bounds in ns
+        '''
+        calls = {}
+        for name, (count, failures, total, low, high, buckets) in self.calls.items():
+            calls[name] = {
+                'calls': count,
+                'failures': failures,
+                'total_s': total / 1e9,
+                'mean_s': total / count / 1e9 if count else 0.0,
+                'min_s': low / 1e9 if low is not None else 0.0,
+                'max_s': high / 1e9,
+                'histogram_ns': {(1 << i) - 1: n for i, n in enumerate(buckets) if n},
+            }
+        caches = {}
+        for name, (hits, misses) in self.caches.items():
+            caches[name] = {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+        return {'calls': calls, 'caches': caches}
+
+
 ############ functions ###############
 
 def taboff():
@@ -219,28 +1122,639 @@ def tabon():
         readline.parse_and_bind('set disable-completion off')
         return
 
+############ mac address functions ###################
+
+def compile_oui_index(csv_paths, index_path):
+    '''
+    builds an OUIIndex file from the IEEE MA-L, MA-M and MA-S registry csv files
+    (oui.csv, mam.csv, oui36.csv from https://standards-oui.ieee.org)
+    returns number of assignments written
+    '''
+    import csv
+    sections = {bits: {} for bits in OUIIndex.BITS}
+    for path in ([csv_paths] if isinstance(csv_paths, str) else csv_paths):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                assignment = row['Assignment'].strip()
+                bits = len(assignment) * 4
+                if bits not in sections:
+                    raise ValueError("Not a MA-L, MA-M or MA-S assignment: %s" % assignment)
+                sections[bits][int(assignment, 16)] = row['Organization Name'].strip()
+    names = {}
+    table = bytearray()
+    records = []
+    for bits in OUIIndex.BITS:
+        for prefix in sorted(sections[bits]):
+            name = sections[bits][prefix].encode('utf-8')
+            if name not in names:
+                names[name] = len(table)
+                table += name
+            records.append(OUIIndex.RECORD.pack(prefix, names[name], len(name)))
+    with open(index_path, 'wb') as f:
+        f.write(OUIIndex.HEADER.pack(OUIIndex.MAGIC, OUIIndex.VERSION, *[len(sections[bits]) for bits in OUIIndex.BITS]))
+        f.write(b''.join(records))
+        f.write(table)
+    return len(records)
+
+_oui = {'path': None, 'index': None}
+
+def set_oui_index(path):
+    '''
+    sets the index file used by MacAddress.vendor and MacAddressArray.vendor_many
+    defaults to the MY_TOOLS_OUI_INDEX environment variable
+    '''
+    if _oui['index'] is not None:
+        _oui['index'].close()
+    _oui['path'], _oui['index'] = path, None
+
+def _oui_index():
+    '''
+    returns the shared OUIIndex, opened on first use
+    '''
+    import os
+    if _oui['index'] is None:
+        path = _oui['path'] or os.environ.get('MY_TOOLS_OUI_INDEX')
+        if not path:
+            raise FileNotFoundError("No OUI index set, build one with compile_oui_index() and call set_oui_index()")
+        _oui['index'] = OUIIndex(path)
+    return _oui['index']
+
 ############ ipaddress functions ###################
 
-def findholes(ipaddresslist, terse=True):
+def _numpy():
+    '''
+    returns the numpy module, or None if it is not installed
+    numpy is optional, everything falls back to the array module without it
+    '''
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _ipv4_ints(ips):
+    '''
+    converts a batch of IPv4 addresses to unsigned 32 bit integers
+    without creating an ipaddress object per address
+    accepts strings, ints, IPv4Address objects, a numpy integer array or a buffer of packed addresses
+    returns a numpy uint32 array when numpy is available, else array('I')
+    '''
+    import sys
+    from array import array
+    np = _numpy()
+    if np is not None and isinstance(ips, np.ndarray) and ips.dtype.kind in 'iu':
+        ## signed or wider values would wrap into valid addresses on the cast
+        if (ips.dtype.kind == 'i' or ips.dtype.itemsize > 4) and len(ips) and (ips.min() < 0 or ips.max() > 0xffffffff):
+            raise ValueError("Not a IP address or format incorrect")
+        return ips.astype(np.uint32, copy=False)
+    if isinstance(ips, (bytes, bytearray, memoryview)):
+        packed = memoryview(ips).cast('B')
+    else:
+        ips = ips if isinstance(ips, (list, tuple)) else list(ips)
+        if ips and not isinstance(ips[0], str):
+            def to_int(ip):
+                if getattr(ip, 'version', 4) != 4:
+                    raise ValueError(ip)
+                return int(ip)
+            try:
+                ints = array('I', map(to_int, ips))
+            except (OverflowError, TypeError, ValueError):
+                raise ValueError("Not a IP address or format incorrect")
+            return ints if np is None else np.frombuffer(ints, dtype=np.uint32)
+        import socket
+        from functools import partial
+        try:
+            packed = b''.join(map(partial(socket.inet_pton, socket.AF_INET), ips))
+        except (OSError, TypeError):
+            raise ValueError("Not a IP address or format incorrect")
+    if len(packed) % 4:
+        raise ValueError("Packed addresses must be 4 bytes each")
+    if np is not None:
+        return np.frombuffer(packed, dtype='>u4').astype(np.uint32)
+    ints = array('I')
+    ints.frombytes(packed)
+    if sys.byteorder == 'little':
+        ints.byteswap()
+    return ints
+
+def _ip_int(ip):
+    '''
+    returns (version, int) for an IPv4/IPv6 address given as string, int or ipaddress object
+    ints below 2**32 are taken as IPv4
+    '''
+    import socket
+    if isinstance(ip, str):
+        ip = ip.strip()
+        family, version = (socket.AF_INET6, 6) if ':' in ip else (socket.AF_INET, 4)
+        try:
+            return version, int.from_bytes(socket.inet_pton(family, ip), 'big')
+        except OSError:
+            raise ValueError("Not a IP address or format incorrect: %s" % ip)
+    version = getattr(ip, 'version', None)
+    ip = int(ip)
+    if not 0 <= ip < 2 ** 128:
+        raise ValueError("Not a IP address or format incorrect: %s" % ip)
+    return version or (4 if ip < 2 ** 32 else 6), ip
+
+def _int_ip(version, ip):
+    '''
+    returns string of an int address, inverse of _ip_int
+    '''
+    import socket
+    if version == 4:
+        return socket.inet_ntop(socket.AF_INET, ip.to_bytes(4, 'big'))
+    return socket.inet_ntop(socket.AF_INET6, ip.to_bytes(16, 'big'))
+
+def _iter_source(source):
+    '''
+    yields addresses from an iterable, an open file or a path to a file
+    files are read line by line, blank lines are skipped
+    '''
+    import os
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as f:
+            yield from _iter_source(f)
+        return
+    if hasattr(source, 'read'):
+        for line in source:
+            line = line.strip()
+            if line:
+                yield line
+        return
+    yield from source
+
+def _sorted_ips(addresses):
+    '''
+    returns (version, sorted unique ints) for an iterable of addresses of a single IP version
+    '''
+    from array import array
+    version = None
+    ints = None
+    for ip in _iter_source(addresses):
+        v, i = _ip_int(ip)
+        if version is None:
+            version = v
+            ## 128 bit values do not fit an array, IPv6 uses a plain list
+            ints = array('I') if v == 4 else []
+        elif v != version:
+            raise ValueError("Mixed IPv4 and IPv6 addresses: %s" % ip)
+        ints.append(i)
+    if version is None:
+        return None, []
+    np = _numpy()
+    if np is not None and version == 4:
+        return version, np.unique(np.frombuffer(ints, dtype=np.uint32))
+    return version, sorted(set(ints))
+
+def _free_int_ranges(ints):
+    '''
+    yields (start, end) int pairs missing between consecutive sorted unique ints
+    '''
+    np = _numpy()
+    if np is not None and isinstance(ints, np.ndarray):
+        gaps = np.flatnonzero(np.diff(ints.astype(np.int64)) > 1)
+        for start, end in zip((ints[gaps] + 1).tolist(), (ints[gaps + 1] - 1).tolist()):
+            yield start, end
+        return
+    prev = None
+    for ip in ints:
+        if prev is not None and ip > prev + 1:
+            yield prev + 1, ip - 1
+        prev = ip
+
+def free_ranges(addresses, as_int=False):
+    '''
+    generator of (start, end) ranges of addresses NOT in addresses,
+    between the lowest and the highest address
+    addresses may be unsorted, an iterable, an open file or a path to a file
+    with one address per line, IPv4 or IPv6 but not both
+    runs in O(n log n) time and O(n) memory, independent of the size of the range
+    yields ipaddress objects, or ints if as_int is True
+    '''
+    from ipaddress import IPv4Address, IPv6Address
+    version, ints = _sorted_ips(addresses)
+    address = IPv4Address if version == 4 else IPv6Address
+    for start, end in _free_int_ranges(ints):
+        if as_int:
+            yield start, end
+        else:
+            yield address(start), address(end)
+
+def free_cidrs(addresses):
+    '''
+    generator of the networks NOT in addresses, between the lowest and the highest address
+    same input as free_ranges, each free range is split into the fewest CIDR blocks
+    '''
+    from ipaddress import summarize_address_range
+    for start, end in free_ranges(addresses):
+        yield from summarize_address_range(start, end)
+
+def findholes(ipaddresslist, terse=True, lazy=False):
     '''
     returns list of ipaddresses NOT in the list between the lowest IP and the highest IP
     verbose mode returns the list of ipaddresses with empty strings taking the place of 
     missing IP addresses
     note: this list can be very long if including multiple subnets, by accident or otherwise
+    lazy=True returns a generator instead of a list, see free_ranges/free_cidrs for a compact result
+    ipaddresslist is no longer sorted in place
+    '''
+    version, ints = _sorted_ips(ipaddresslist)
+    def terse_view():
+        for start, end in _free_int_ranges(ints):
+            for ip in range(start, end + 1):
+                yield _int_ip(version, ip)
+    def verbose_view():
+        prev = None
+        for ip in ints:
+            ip = int(ip)
+            if prev is not None:
+                for _ in range(ip - prev - 1):
+                    yield ''
+            yield _int_ip(version, ip)
+            prev = ip
+    view = terse_view() if terse else verbose_view()
+    return view if lazy else list(view)
+
+
+def _net_interval(net):
     '''
-    from ipaddress import ip_address
-    ipaddresslist.sort(key=lambda x: ipaddress.ip_address(x))
-    start_ip_as_int = int(ipaddress.ip_address(ipaddresslist[0]))
-    end_ip_as_int = int(ip_address(ipaddresslist[-1]))
-    if terse:
-        return [ str(ip_address(ip_as_int)) for ip_as_int in range(start_ip_as_int, end_ip_as_int + 1) if str(ip_address(ip_as_int)) not in ipaddresslist ]
+    returns (version, first, last) ints of an address or network
+    networks may be strings in prefix form, host bits are masked off,
+    or (int, prefixlen) tuples, IPv4 if the int fits 32 bits as with ip_network
+    '''
+    if hasattr(net, 'network_address'):
+        return net.version, int(net.network_address), int(net.broadcast_address)
+    if isinstance(net, tuple):
+        ip, plen = net
+        bits = 32 if ip < 2 ** 32 else 128
+        host = (1 << (bits - plen)) - 1
+        return (4 if bits == 32 else 6), ip & ~host, ip | host
+    if isinstance(net, str) and '/' in net:
+        address, plen = net.strip().split('/', 1)
+        version, ip = _ip_int(address)
+        bits = 32 if version == 4 else 128
+        try:
+            plen = int(plen)
+        except ValueError:
+            plen = -1
+        if not 0 <= plen <= bits:
+            raise ValueError("Not a IP network or format incorrect: %s" % net)
+        host = (1 << (bits - plen)) - 1
+        return version, ip & ~host, ip | host
+    version, ip = _ip_int(net)
+    return version, ip, ip
+
+def _collapse_intervals(intervals):
+    '''
+    returns sorted list of [first, last] with overlapping and adjacent intervals merged
+    '''
+    merged = []
+    for first, last in sorted(intervals, key=lambda interval: interval[0]):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1][1] = last
+        else:
+            merged.append([first, last])
+    return merged
+
+def _np_collapse_intervals(np, firsts, lasts):
+    '''
+    numpy version of _collapse_intervals, takes and returns two int64 arrays
+    '''
+    if not len(firsts):
+        return firsts, lasts
+    order = np.argsort(firsts, kind='stable')
+    firsts, lasts = firsts[order], lasts[order]
+    reach = np.maximum.accumulate(lasts)
+    new = np.empty(len(firsts), dtype=bool)
+    new[0] = True
+    new[1:] = firsts[1:] > reach[:-1] + 1
+    groups = np.flatnonzero(new)
+    return firsts[groups], np.maximum.reduceat(lasts, groups)
+
+def _range_cidrs(first, last, bits):
+    '''
+    yields (network, prefixlen) of the fewest CIDR blocks covering first..last
+    '''
+    while first <= last:
+        size = first & -first if first else 1 << bits
+        while first + size - 1 > last:
+            size >>= 1
+        yield first, bits - size.bit_length() + 1
+        first += size
+
+def _interval_networks(version, intervals):
+    '''
+    yields the fewest IPv4Network/IPv6Network objects covering sorted, disjoint (first, last) intervals
+    '''
+    from ipaddress import IPv4Network, IPv6Network
+    bits, network = (32, IPv4Network) if version == 4 else (128, IPv6Network)
+    for first, last in intervals:
+        for cidr in _range_cidrs(first, last, bits):
+            yield network(cidr)
+
+def _version_intervals(nets):
+    '''
+    returns {4: intervals, 6: intervals} of nets collapsed into sorted, disjoint [first, last] lists
+    '''
+    intervals = {4: [], 6: []}
+    for net in _iter_source(nets):
+        version, first, last = _net_interval(net)
+        intervals[version].append((first, last))
+    return {version: _collapse_intervals(i) for version, i in intervals.items()}
+
+def _intersect_intervals(a, b):
+    '''
+    returns intervals in both of the sorted, disjoint interval lists a and b
+    '''
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        first, last = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if first <= last:
+            result.append((first, last))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def _subtract_intervals(a, b):
+    '''
+    returns intervals in a but not in b, both sorted, disjoint interval lists
+    '''
+    result = []
+    j = 0
+    for first, last in a:
+        while j < len(b) and b[j][1] < first:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] <= last and first <= last:
+            if b[k][0] > first:
+                result.append((first, b[k][0] - 1))
+            first = b[k][1] + 1
+            k += 1
+        if first <= last:
+            result.append((first, last))
+    return result
+
+def _net_source(nets):
+    '''
+    returns nets as accepted by _iter_source, with a str taken as one network, not a path
+    files are only read from open files and os.PathLike paths
+    '''
+    return [nets] if isinstance(nets, str) else nets
+
+def network_union(a, b):
+    '''
+    returns the fewest networks covering every address in a or b
+    a and b are iterables of networks or addresses, a single network string,
+    an open file or an os.PathLike path, IPv4 and IPv6 may be mixed
+    '''
+    return aggregate(_chain(_net_source(a), _net_source(b)))
+
+def network_intersection(a, b):
+    '''
+    returns the fewest networks covering every address in both a and b
+    runs as a linear sweep over the collapsed intervals of a and b
+    '''
+    a, b = _version_intervals(_net_source(a)), _version_intervals(_net_source(b))
+    return [net for version in (4, 6) for net in _interval_networks(version, _intersect_intervals(a[version], b[version]))]
+
+def network_difference(a, b):
+    '''
+    returns the fewest networks covering every address in a but not in b
+    runs as a linear sweep over the collapsed intervals of a and b
+    '''
+    a, b = _version_intervals(_net_source(a)), _version_intervals(_net_source(b))
+    return [net for version in (4, 6) for net in _interval_networks(version, _subtract_intervals(a[version], b[version]))]
+
+def network_overlaps(a, b):
+    '''
+    returns the entries of a, unchanged and in order, that share any address with b
+    '''
+    from bisect import bisect_left
+    b = _version_intervals(_net_source(b))
+    lasts = {version: [last for _, last in b[version]] for version in b}
+    result = []
+    for net in _iter_source(_net_source(a)):
+        version, first, last = _net_interval(net)
+        ## first interval of b ending at or after first, overlaps if it starts by last
+        i = bisect_left(lasts[version], first)
+        if i < len(b[version]) and b[version][i][0] <= last:
+            result.append(net)
+    return result
+
+def _chain(*iterables):
+    '''
+    chains iterables, open files or paths as accepted by _iter_source
+    '''
+    for iterable in iterables:
+        yield from _iter_source(iterable)
+
+def aggregate(nets, maxprefix=None, maxprefix6=None, chunksize=65536):
+    '''
+    returns the minimal list of networks covering all addresses and networks in nets
+    nets may be an iterable, an open file or a path to a file with one entry per line,
+    mixing IPv4 and IPv6 is fine, IPv4 networks are returned first
+    maxprefix widens every IPv4 entry to at most that prefix length before merging,
+    maxprefix6 does the same for IPv6
+    input is consumed chunksize entries at a time and only the merged intervals are kept,
+    so memory is bounded by the size of the result, not the input
+    '''
+    from itertools import islice
+    np = _numpy()
+    source = _iter_source(nets)
+    merged = {4: [], 6: []}
+    while True:
+        chunk = list(islice(source, chunksize))
+        if not chunk:
+            break
+        new = {4: [], 6: []}
+        for net in chunk:
+            version, first, last = _net_interval(net)
+            new[version].append((first, last))
+        for version, intervals in new.items():
+            if not intervals:
+                continue
+            bits = 32 if version == 4 else 128
+            cap = maxprefix if version == 4 else maxprefix6
+            if np is not None and version == 4:
+                block = np.array(intervals, dtype=np.int64).reshape(-1, 2)
+                firsts, lasts = block[:, 0], block[:, 1]
+                if cap is not None:
+                    host = (1 << (bits - cap)) - 1
+                    firsts = firsts & ~host
+                    lasts = lasts | host
+                if len(merged[4]):
+                    firsts = np.concatenate((merged[4][0], firsts))
+                    lasts = np.concatenate((merged[4][1], lasts))
+                merged[4] = _np_collapse_intervals(np, firsts, lasts)
+            else:
+                if cap is not None:
+                    host = (1 << (bits - cap)) - 1
+                    intervals = [(first & ~host, last | host) for first, last in intervals]
+                merged[version] = _collapse_intervals(merged[version] + intervals)
+    result = []
+    for version in (4, 6):
+        intervals = merged[version]
+        if np is not None and version == 4 and len(intervals):
+            intervals = zip(intervals[0].tolist(), intervals[1].tolist())
+        result.extend(_interval_networks(version, intervals))
+    return result
+
+def summarize(ipl, preflen, collapse=False, chunksize=65536):
+    '''
+    returns sorted list of the distinct network addresses of the IPv4 addresses in ipl
+    masked to prefix length preflen
+    ipl may be an iterable, an open file or a path to a file with one address per line,
+    a numpy integer array or a buffer of packed addresses
+    input is consumed chunksize addresses at a time and only the distinct prefixes are kept,
+    so memory is bounded by the size of the result, not the input
+    collapse=True returns aggregate(ipl, maxprefix=preflen) instead:
+    the fewest networks, no longer than preflen, covering every address
+    '''
+    from ipaddress import IPv4Address
+    from itertools import islice
+    if collapse:
+        return aggregate(ipl, maxprefix=preflen, chunksize=chunksize)
+    mask = ((1 << preflen) - 1) << (32 - preflen)
+    np = _numpy()
+    if isinstance(ipl, (bytes, bytearray, memoryview)) or (np is not None and isinstance(ipl, np.ndarray)):
+        batches = [ipl]
     else:
-        return [ str(ip_address(ip_as_int)) if str(ip_address(ip_as_int)) in ipaddresslist else '' for ip_as_int in range(start_ip_as_int, end_ip_as_int + 1) ]
+        source = _iter_source(ipl)
+        batches = iter(lambda: list(islice(source, chunksize)), [])
+    if np is not None:
+        prefixes = np.empty(0, dtype=np.uint32)
+        for batch in batches:
+            prefixes = np.union1d(prefixes, _ipv4_ints(batch) & np.uint32(mask))
+        return [IPv4Address(ip) for ip in prefixes.tolist()]
+    prefixes = set()
+    for batch in batches:
+        prefixes.update(ip & mask for ip in _ipv4_ints(batch))
+    return [IPv4Address(ip) for ip in sorted(prefixes)]
+############ instrumentation functions ###################
+## instrumentation swaps the hot paths for timing wrappers while it is on
+## and puts the plain functions back when it is off, so when disabled
+## lookups and parsing run exactly as if it did not exist
 
+_collectors = []
+_stats = {'global': None, 'originals': []}
 
-def summarize(ipl, preflen):
+def _hot_paths():
     '''
+    returns list of (owner, attribute name, stats name, cache check or None)
+    a cache check is called with the arguments and tells if the call will be a cache hit
     '''
-    from ipaddress import ip_address as add
-    return sort(list({add(((2 ** preflen - 1) << (32 - preflen)) & int(add(ip))) for ip in ipl}))
+    paths = [
+        (IPv4NetworkArray, '__contains__', 'IPv4NetworkArray.__contains__', None),
+        (IPv4NetworkArray, 'find_all_nets_for_ip', 'IPv4NetworkArray.find_all_nets_for_ip', None),
+        (IPv4NetworkArray, 'longest_match', 'IPv4NetworkArray.longest_match', None),
+        (IPv4NetworkArray, 'match_many', 'IPv4NetworkArray.match_many', None),
+        (IPv4NetworkArray, '_interval_table', 'IPv4NetworkArray.interval_table', lambda self: self._intervals is not None),
+        (MacAddress, '__init__', 'MacAddress.parse', None),
+        (MacAddressArray, 'extend', 'MacAddressArray.parse', None),
+    ]
+    try:
+        import ip2hex
+    except ImportError:
+        pass
+    else:
+        paths.append((ip2hex, 'ip2hex', 'ip2hex', None))
+    return paths
+
+def _instrument(func, name, cached):
+    '''
+    returns a wrapper of func recording into every active collector
+    '''
+    from functools import wraps
+    from time import perf_counter_ns
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if cached is not None:
+            hit = cached(*args, **kwargs)
+            for c in _collectors:
+                c.cache(name, hit)
+        start = perf_counter_ns()
+        try:
+            result = func(*args, **kwargs)
+        except ValueError:
+            ## failures are counted but not timed, so they stay out of the latency histogram
+            for c in _collectors:
+                c.failure(name)
+            raise
+        elapsed = perf_counter_ns() - start
+        for c in _collectors:
+            c.record(name, elapsed)
+        return result
+    return wrapper
+
+def _install():
+    if _stats['originals']:
+        return
+    for owner, attr, name, cached in _hot_paths():
+        func = owner.__dict__[attr] if isinstance(owner, type) else getattr(owner, attr)
+        _stats['originals'].append((owner, attr, func))
+        setattr(owner, attr, _instrument(func, name, cached))
+
+def _uninstall():
+    while _stats['originals']:
+        owner, attr, func = _stats['originals'].pop()
+        setattr(owner, attr, func)
+
+def enable_stats():
+    '''
+    turns on instrumentation of lookups, mac parsing and ip2hex, read it with stats()
+    '''
+    if _stats['global'] is None:
+        _stats['global'] = Stats()
+        _collectors.append(_stats['global'])
+    _install()
+
+def disable_stats():
+    '''
+    turns instrumentation off and drops what stats() collected
+    '''
+    if _stats['global'] is not None:
+        _collectors.remove(_stats['global'])
+        _stats['global'] = None
+    if not _collectors:
+        _uninstall()
+
+def reset_stats():
+    if _stats['global'] is not None:
+        _stats['global'].reset()
+
+def stats():
+    '''
+    returns snapshot of what was collected since enable_stats(), empty if it is off
+    caches also lists the OUI index lru caches, counted since the index was opened
+    '''
+    snapshot = _stats['global'].snapshot() if _stats['global'] is not None else {'calls': {}, 'caches': {}}
+    if _stats['global'] is not None and _oui['index'] is not None:
+        for name, cache in (('OUIIndex.oui', _oui['index']._oui), ('OUIIndex.fine', _oui['index']._fine)):
+            info = cache.cache_info()
+            total = info.hits + info.misses
+            snapshot['caches'][name] = {'hits': info.hits, 'misses': info.misses, 'hit_rate': info.hits / total if total else 0.0}
+    return snapshot
+
+class profiling(object):
+    '''
+    context manager collecting stats only for the calls made inside it
+    with profiling() as p:
+        ...
+    p.snapshot()
+    instrumentation is switched off again on exit unless enable_stats() is on
+    '''
+    def __enter__(self):
+        self.stats = Stats()
+        _collectors.append(self.stats)
+        _install()
+        return self.stats
+    def __exit__(self, *exc):
+        _collectors.remove(self.stats)
+        if not _collectors:
+            _uninstall()
+
 ############### ignore below here ##########
@@ -0,0 +1,50 @@
+import pytest
+
+import lorem
+
+
+def read(size, unit='bytes', seed=0, chunk=None):
+    return b''.join(bytes(view) for view in lorem.stream(size, unit, seed, chunk))
+
+
+def test_bytes_same_for_every_chunk_size():
+    size = 5 * (1 << 16) + 123
+    expected = read(size, chunk=1)
+    assert len(expected) == size
+    for chunk in (7, 1000, 1 << 16, (1 << 16) + 1, 1 << 20, 3 << 20):
+        assert read(size, chunk=chunk) == expected
+
+
+def test_bytes_same_after_large_chunk_stream():
+    expected = read(1 << 18, chunk=4096)
+    read(1 << 22, chunk=1 << 22)
+    assert read(1 << 18, chunk=4096) == expected
+
+
+def test_units_same_for_every_chunk_size():
+    for unit in ('words', 'sentences', 'paragraphs'):
+        expected = read(200, unit, 3)
+        for chunk in (1, 7, 200, 1000):
+            assert read(200, unit, 3, chunk) == expected
+
+
+def test_seeds_differ():
+    assert read(4096, seed=1) != read(4096, seed=2)
+
+
+def test_write_to(tmp_path):
+    path = tmp_path / 'payload.txt'
+    with open(path, 'wb') as f:
+        assert lorem.write_to(f, 100000, seed=5, chunk=333) == 100000
+    assert path.read_bytes() == read(100000, seed=5)
+
+
+def test_unknown_unit_raises_on_call():
+    with pytest.raises(ValueError):
+        lorem.stream(10, unit='lines')
+
+
+def test_pools_are_bounded():
+    for seed in range(lorem._POOLS * 2):
+        read(100, seed=seed)
+    assert lorem._pool.cache_info().currsize <= lorem._POOLS
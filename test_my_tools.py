@@ -0,0 +1,204 @@
+import ipaddress
+import pickle
+import random
+
+import pytest
+
+from my_tools import IPv4NetworkArray, MacAddress, network_overlaps, network_union, profiling, summarize
+
+
+def random_nets(r, n):
+    ## a small address space so networks nest and overlap
+    nets = []
+    for _ in range(n):
+        plen = r.randint(8, 32)
+        net = (10 << 24 | r.getrandbits(12) << 12) & ~((1 << (32 - plen)) - 1)
+        nets.append('%s/%d' % (ipaddress.IPv4Address(net), plen))
+    return nets
+
+
+def random_ips(r, n):
+    return ['10.%d.%d.%d' % (r.getrandbits(4), r.getrandbits(8), r.getrandbits(8)) for _ in range(n)]
+
+
+def assert_same_lookups(indexed, plain, ips):
+    for ip in ips:
+        assert (ip in indexed) == (ip in plain)
+        assert list(indexed.find_all_nets_for_ip(ip)) == list(plain.find_all_nets_for_ip(ip))
+        assert indexed.longest_match(ip) == plain.longest_match(ip)
+    for net in set(plain):
+        assert net in indexed
+
+
+def test_index_in_sync_after_mutations():
+    r = random.Random(1)
+    nets = random_nets(r, 200)
+    indexed = IPv4NetworkArray(nets).build_index()
+    plain = IPv4NetworkArray(nets)
+    for _ in range(500):
+        op = r.choice(('append', 'setitem', 'delitem', 'pop', 'insert', 'delslice'))
+        net = random_nets(r, 1)[0]
+        i = r.randrange(len(plain)) if len(plain) else 0
+        for a in (indexed, plain):
+            if op == 'append':
+                a.append(net)
+            elif op == 'setitem' and len(a):
+                a[i] = net
+            elif op == 'delitem' and len(a):
+                del a[i]
+            elif op == 'pop' and len(a):
+                a.pop()
+            elif op == 'insert':
+                a.insert(i, net)
+            elif op == 'delslice':
+                del a[i:i + 3]
+        assert indexed == plain
+    assert_same_lookups(indexed, plain, random_ips(r, 300))
+    ## a trie built from scratch holds the same prefixes as the one kept in sync
+    assert_same_lookups(IPv4NetworkArray(list(plain)).build_index(), indexed, random_ips(r, 300))
+
+
+def test_index_removes_to_empty():
+    nets = ['10.0.0.0/8', '10.0.0.0/8', '10.1.0.0/16', '10.1.2.0/24']
+    a = IPv4NetworkArray(nets).build_index()
+    while len(a):
+        a.pop()
+        assert '10.1.2.3' in a or not len(a)
+    assert '10.1.2.3' not in a
+    assert a._trie.root.children == [None, None]
+
+
+def test_lookups_match_ipaddress():
+    r = random.Random(2)
+    nets = random_nets(r, 300)
+    nets += nets[:20]
+    objects = [ipaddress.IPv4Network(n) for n in nets]
+    ips = random_ips(r, 500) + ['192.168.1.1']
+    plain = IPv4NetworkArray(nets)
+    indexed = IPv4NetworkArray(nets).build_index()
+    owners = plain.match_many(ips)
+    for ip, owner in zip(ips, owners):
+        address = ipaddress.IPv4Address(ip)
+        containing = [o for o in objects if address in o]
+        expected = sorted(containing, key=lambda o: o.prefixlen)
+        for a in (plain, indexed):
+            assert (ip in a) == bool(containing)
+            assert list(a.find_all_nets_for_ip(ip)) == [str(o) for o in expected]
+            assert a.longest_match(ip) == (str(expected[-1]) if expected else None)
+        if containing:
+            assert objects[owner] == expected[-1]
+            ## duplicates resolve to the first occurrence
+            assert owner == objects.index(expected[-1])
+        else:
+            assert owner == -1
+    assert list(plain.contains_many(ips)) == [ip in plain for ip in ips]
+
+
+def test_summarize_sources(tmp_path):
+    ips = ['10.0.%d.%d' % (i % 7, i) for i in range(250)]
+    path = tmp_path / 'ips.txt'
+    path.write_text('\n'.join(ips) + '\n\n')
+    expected = [ipaddress.IPv4Address('10.0.%d.0' % i) for i in range(7)]
+    assert summarize(ips, 24) == expected
+    assert summarize(iter(ips), 24, chunksize=7) == expected
+    assert summarize(str(path), 24) == expected
+    with open(path) as f:
+        assert summarize(f, 24) == expected
+    assert summarize([ipaddress.IPv4Address(ip) for ip in ips], 24) == expected
+
+
+def test_set_operators_take_a_network_string(tmp_path, monkeypatch):
+    ## a file with the same relative name as the network must not be read
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / '10.1.0.0').mkdir()
+    (tmp_path / '10.1.0.0' / '16').write_text('192.168.0.0/16\n')
+    arr = IPv4NetworkArray(['10.0.0.0/16', '10.2.0.0/16'])
+    assert list(arr | '10.1.0.0/16') == ['10.0.0.0/15', '10.2.0.0/16']
+    assert list(arr & '10.0.128.0/17') == ['10.0.128.0/17']
+    assert list(arr - '10.0.128.0/17') == ['10.0.0.0/17', '10.2.0.0/16']
+    assert list(arr.overlaps('10.2.3.0/24')) == ['10.2.0.0/16']
+    assert list(arr.overlaps('10.1.0.0/16')) == []
+    assert network_overlaps('10.1.2.0/24', ['10.0.0.0/8']) == ['10.1.2.0/24']
+    ## paths are still read when passed as os.PathLike
+    assert [str(n) for n in network_union(tmp_path / '10.1.0.0' / '16', '10.0.0.0/8')] == ['10.0.0.0/8', '192.168.0.0/16']
+
+
+def test_snapshot_mmap_round_trip(tmp_path):
+    r = random.Random(3)
+    nets = random_nets(r, 1000)
+    path = tmp_path / 'nets.ipna'
+    IPv4NetworkArray(nets).save(path)
+    loaded = IPv4NetworkArray.load(path, mmap=True)
+    assert isinstance(loaded._nets, memoryview)
+    assert list(loaded) == nets
+    assert loaded == IPv4NetworkArray.load(path, mmap=False)
+    ips = random_ips(r, 200)
+    assert list(loaded.match_many(ips)) == list(IPv4NetworkArray(nets).match_many(ips))
+    loaded.build_index()
+    ## the first change copies the mapped storage, the file stays as it was
+    loaded.append('192.168.0.0/16')
+    loaded[0] = '172.16.0.0/12'
+    del loaded[1]
+    loaded.insert(5, '10.0.0.0/8')
+    expected = list(nets)
+    expected.append('192.168.0.0/16')
+    expected[0] = '172.16.0.0/12'
+    del expected[1]
+    expected.insert(5, '10.0.0.0/8')
+    assert list(loaded) == expected
+    assert loaded._map is None
+    assert list(IPv4NetworkArray.load(path)) == nets
+    assert_same_lookups(loaded, IPv4NetworkArray(expected), ips + ['192.168.1.1', '172.16.0.1'])
+    ## interval table is rebuilt after the change
+    assert list(loaded.match_many(['192.168.1.1', '172.16.0.1'])) == [len(expected) - 1, 0]
+    loaded.save(path)
+    assert list(IPv4NetworkArray.load(path)) == expected
+
+
+def test_snapshot_bytes_and_pickle():
+    arr = IPv4NetworkArray(['10.0.0.0/8', '10.1.2.3', '0.0.0.0/0'])
+    assert list(IPv4NetworkArray.from_buffer(arr.tobytes())) == list(arr)
+    assert list(IPv4NetworkArray.from_buffer(bytearray(arr.tobytes()))) == list(arr)
+    assert pickle.loads(pickle.dumps(arr)) == arr
+    assert len(IPv4NetworkArray.from_buffer(IPv4NetworkArray().tobytes())) == 0
+    for bad in (b'', b'XXXX' + arr.tobytes()[4:], arr.tobytes()[:-1]):
+        with pytest.raises(ValueError):
+            IPv4NetworkArray.from_buffer(bad)
+
+
+def test_stats_do_not_time_failures():
+    with profiling() as p:
+        for mac in ('zz', '00:11:22:33:44:55', 'yy'):
+            try:
+                MacAddress(mac)
+            except ValueError:
+                pass
+    parse = p.snapshot()['calls']['MacAddress.parse']
+    assert (parse['calls'], parse['failures']) == (1, 2)
+    assert parse['min_s'] > 0
+    assert sum(parse['histogram_ns'].values()) == 1
+
+
+def test_interval_table_in_snapshot(tmp_path):
+    r = random.Random(4)
+    nets = random_nets(r, 500)
+    nets += nets[:20]
+    ips = random_ips(r, 500)
+    arr = IPv4NetworkArray(nets)
+    expected = [list(arr.find_all_nets_for_ip(ip)) for ip in ips]
+    assert [[arr[i] for i in found] for found in arr.find_all_many(ips)] == expected
+    path = tmp_path / 'nets.ipna'
+    arr.save(path, index=True)
+    for loaded in (IPv4NetworkArray.load(path), IPv4NetworkArray.from_buffer(arr.tobytes(index=True))):
+        ## the table comes with the snapshot instead of being rebuilt
+        assert loaded._intervals is not None
+        assert list(loaded) == nets
+        assert list(loaded.match_many(ips)) == list(arr.match_many(ips))
+        assert [[loaded[i] for i in found] for found in loaded.find_all_many(ips)] == expected
+        loaded.append('10.0.0.0/8')
+        assert loaded._intervals is None
+        assert all(found[0] == len(nets) for found in loaded.find_all_many(ips))
+    assert IPv4NetworkArray.from_buffer(arr.tobytes())._intervals is None
+    assert IPv4NetworkArray().find_all_many(ips[:3]) == [[], [], []]
+    with pytest.raises(ValueError):
+        IPv4NetworkArray.from_buffer(arr.tobytes(index=True)[:-1])